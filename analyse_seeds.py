@@ -0,0 +1,187 @@
+"""
+Generate the worlds for a range of seeds, and measure them without playing them.
+
+Run this from the game folder:
+    python analyse_seeds.py 0 100000
+generates the worlds for seeds 0 to 99999 across every core, and writes seeds.csv,
+with one row per seed and these columns:
+    seed
+    rooms_right, rooms_left, rooms_down - the number of rooms moving in each direction,
+        not counting the starting and ending rooms
+    height - the height of the whole world in tiles
+    Volcano, Ghost, FireBat - the number of each enemy
+    breakable_walls - the number of walls that bombs can destroy
+    weapons - the number of weapons, both in chests and scattered around the world
+    path_length - the fewest tiles moved from the starting room to the floor of the ending room.
+        Breakable walls count as open, and the hero's jumping and falling are ignored.
+    walls_to_break - the number of breakable walls in the way along that path
+Open seeds.csv in a spreadsheet, or use the csv module, to sort and filter the seeds.
+With --tag, every seed measured is also saved to the game's seed store (see seedstore.py)
+with that tag, to be listed in the My Maps menu.
+
+Worlds are generated with worldgen.build_layout, exactly as they are in game,
+with settings['GENERATOR_VERSION'] unless --version is given.
+Nothing is drawn, and the worlds aren't stored in worldcache/.
+
+Run with --help for the rest of the options.
+"""
+import os
+import csv
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from config import settings
+import constants as c
+import rooms as r
+import worldgen
+
+ROOM_COUNT = 30  # the same as InGame.room_number
+CHUNK_SIZE = 64  # seeds handed to a process at a time
+
+COLUMNS = (['seed', 'rooms_right', 'rooms_left', 'rooms_down', 'height'] +
+           sorted(r.ENEMY_TILES.values()) +
+           ['breakable_walls', 'weapons', 'path_length', 'walls_to_break'])
+
+DIRECTION_COLUMNS = {c.MOVE_RIGHT: 'rooms_right', c.MOVE_LEFT: 'rooms_left', c.MOVE_DOWN: 'rooms_down'}
+
+
+def find_path(layout):
+    """
+    Find the shortest path through a world from the starting room to the end tiles.
+
+    Moves one tile at a time, up, down, left or right, through any tile that isn't a wall.
+    Breakable walls are treated as open, as the hero can bomb them.
+    The path ends on any tile directly above an 'R' tile.
+
+    :param layout: The worldgen.WorldLayout to search
+    :returns path_length, walls_to_break: The number of tiles moved and the number of breakable
+        walls on the path, or None, None if there is no path
+    """
+    solid = set()
+    breakable = set()
+    end_tiles = set()
+    for position, char, weapon_number in layout.spawns:
+        if char == 'B':
+            breakable.add(position)
+        elif char in r.WALL_TILES and 'damage' not in r.WALL_TILES[char]:
+            solid.add(position)
+            if char == 'R':
+                end_tiles.add((position[0], position[1] - 1))
+
+    open_tiles = set(layout.nodes) - solid
+
+    start_room, x_offset, y_offset = layout.placements[0]
+    starts = [(x_offset + column, y_offset + row) for column, row in start_room.nodes]
+    starts = [tile for tile in starts if tile in open_tiles and tile not in breakable]
+
+    # Breadth first search, remembering how many breakable walls were passed on the way to each tile
+    walls_passed = {tile: 0 for tile in starts}
+    distances = {tile: 0 for tile in starts}
+    frontier = deque(starts)
+    while frontier:
+        tile = frontier.popleft()
+        if tile in end_tiles:
+            return distances[tile], walls_passed[tile]
+
+        x, y = tile
+        for neighbor in ((x + 1, y), (x, y + 1), (x - 1, y), (x, y - 1)):
+            if neighbor in open_tiles and neighbor not in distances:
+                distances[neighbor] = distances[tile] + 1
+                walls_passed[neighbor] = walls_passed[tile] + (neighbor in breakable)
+                frontier.append(neighbor)
+
+    return None, None
+
+
+def analyse_seed(seed, room_count, version):
+    """
+    Generate the world for a seed, and measure it
+
+    :param seed: The seed of the world
+    :param room_count: The number of rooms to generate, not counting the start and end
+    :param version: The Int version of the generator to use
+    :returns row: A dictionary of column name: value, with the columns in COLUMNS
+    """
+    layout = worldgen.build_layout(seed, room_count, version)
+
+    row = dict.fromkeys(COLUMNS, 0)
+    row['seed'] = seed
+
+    for room, x_offset, y_offset in layout.placements[1:-1]:
+        row[DIRECTION_COLUMNS[room.direction]] += 1
+    row['height'] = sum(room.height for room, x_offset, y_offset in layout.placements)
+
+    for position, char, weapon_number in layout.spawns:
+        if char in r.ENEMY_TILES:
+            row[r.ENEMY_TILES[char]] += 1
+        elif char == 'B':
+            row['breakable_walls'] += 1
+        elif char == r.WEAPON_TILE:
+            row['weapons'] += 1
+
+    row['path_length'], row['walls_to_break'] = find_path(layout)
+
+    return row
+
+
+def _analyse_seeds(seeds, room_count, version):
+    """
+    Measure a chunk of seeds in a worker process, so that a process gets several seeds at a time
+    """
+    return [analyse_seed(seed, room_count, version) for seed in seeds]
+
+
+def analyse_seeds(start, stop, output, room_count=ROOM_COUNT, version=None, processes=None, tag=None):
+    """
+    Measure the worlds for a range of seeds across a pool of processes, and write them to a csv file.
+
+    :param start: The first seed to measure
+    :param stop: The seed to stop before
+    :param output: The path of the csv file to write
+    :param room_count: The number of rooms to generate, not counting the start and end
+    :param version: The Int version of the generator to use, or None for settings['GENERATOR_VERSION']
+    :param processes: The number of processes to use, or None for one per core
+    :param tag: Save every seed to the seed store with this tag, or None not to save them
+    """
+    if version is None:
+        version = settings['GENERATOR_VERSION']
+
+    if tag is not None:
+        import seedstore  # seedstore imports this module
+
+    chunks = [range(chunk_start, min(chunk_start + CHUNK_SIZE, stop))
+              for chunk_start in range(start, stop, CHUNK_SIZE)]
+
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=processes) as executor, open(output, 'w', newline='') as outfile:
+        writer = csv.DictWriter(outfile, COLUMNS)
+        writer.writeheader()
+
+        chunk_results = executor.map(_analyse_seeds, chunks,
+                                     [room_count] * len(chunks), [version] * len(chunks))
+        for rows in chunk_results:
+            writer.writerows(rows)
+            if tag is not None:
+                seedstore.add_seeds(rows, tag, version)
+
+    print('Measured {count} seeds in {seconds:.1f}s, written to {output}'.format(
+        count=max(stop - start, 0), seconds=time.time() - start_time, output=output))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the worlds for a range of seeds.')
+    parser.add_argument('start', type=int, help='the first seed to measure')
+    parser.add_argument('stop', type=int, help='the seed to stop before')
+    parser.add_argument('-o', '--output', default='seeds.csv', help='the csv file to write (default seeds.csv)')
+    parser.add_argument('-n', '--rooms', type=int, default=ROOM_COUNT,
+                        help='the number of rooms in each world (default {0})'.format(ROOM_COUNT))
+    parser.add_argument('-v', '--version', type=int, default=None,
+                        help='the generator version to use (default settings GENERATOR_VERSION)')
+    parser.add_argument('-p', '--processes', type=int, default=os.cpu_count(),
+                        help='the number of processes to use (default one per core)')
+    parser.add_argument('-t', '--tag', default=None,
+                        help='also save every seed to the seed store with this tag')
+    args = parser.parse_args()
+
+    analyse_seeds(args.start, args.stop, args.output, args.rooms, args.version, args.processes, args.tag)
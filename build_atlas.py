@@ -0,0 +1,114 @@
+"""
+Pack every sprite in Sprites/ into a few large sheets.
+
+Run this before playing or freezing the game:
+    python build_atlas.py
+
+This creates Sprites/atlas0.png (and atlas1.png, etc. if the sprites don't fit on one sheet)
+alongside Sprites/atlas.json, an index of where each sprite was placed.
+The index takes the form:
+    {"sheets": [sheet filenames],
+     "sprites": {path relative to Sprites/: [sheet number, x, y, width, height]}}
+
+helpers.load and helpers.load_frame check for the index, and hand out pieces of the sheets
+instead of loading every sprite from its own file. If the atlas doesn't exist, sprites are
+loaded individually, so the game still runs without this step.
+
+Rerun this whenever a sprite is added or changed.
+"""
+import os
+import json
+import pygame
+import constants as c
+
+SPRITE_FOLDER = 'Sprites'
+INDEX_FILE = 'atlas.json'
+SHEET_SIZE = 1024  # px along each side of a sheet
+PADDING = 1  # px between sprites
+
+
+def find_sprites():
+    """
+    Find every sprite that should be packed into the atlas.
+
+    :returns sprites: A sorted list of paths relative to Sprites/, using / as a separator
+    """
+    sprites = []
+    for root, folders, files in os.walk(SPRITE_FOLDER):
+        for filename in files:
+            if filename.endswith('.png') and not filename.startswith('atlas'):
+                path = os.path.relpath(os.path.join(root, filename), SPRITE_FOLDER)
+                sprites.append(path.replace(os.sep, '/'))
+
+    return sorted(sprites)
+
+
+def pack(sizes):
+    """
+    Place rectangles onto sheets in rows, tallest first.
+
+    :param sizes: A dictionary of name: (width, height)
+    :returns placements: A dictionary of name: [sheet number, x, y, width, height]
+    """
+    placements = {}
+    sheet = 0
+    x = y = 0
+    row_height = 0
+
+    for name, (width, height) in sorted(sizes.items(), key=lambda item: (-item[1][1], item[0])):
+        if width > SHEET_SIZE or height > SHEET_SIZE:
+            raise ValueError('{0} is too large to fit on a {1}px sheet'.format(name, SHEET_SIZE))
+
+        if x + width > SHEET_SIZE:
+            x = 0
+            y += row_height + PADDING
+            row_height = 0
+
+        if y + height > SHEET_SIZE:
+            sheet += 1
+            x = y = 0
+            row_height = 0
+
+        placements[name] = [sheet, x, y, width, height]
+        x += width + PADDING
+        row_height = max(row_height, height)
+
+    return placements
+
+
+def build_atlas():
+    """
+    Pack the sprites and write the sheets and the index to Sprites/
+    """
+    images = {name: pygame.image.load(os.path.join(SPRITE_FOLDER, *name.split('/'))) for name in find_sprites()}
+    placements = pack({name: image.get_size() for name, image in images.items()})
+
+    # Only make each sheet as large as the sprites placed on it
+    sheet_sizes = {}
+    for sheet, x, y, width, height in placements.values():
+        sheet_width, sheet_height = sheet_sizes.get(sheet, (0, 0))
+        sheet_sizes[sheet] = (max(sheet_width, x + width), max(sheet_height, y + height))
+
+    sheets = [pygame.Surface(sheet_sizes[index], pygame.SRCALPHA) for index in range(len(sheet_sizes))]
+    for sheet in sheets:
+        sheet.fill(c.COLORKEY + (0,))
+
+    # Adding onto a cleared area copies the pixels exactly, instead of blending them with the fill
+    for name, (sheet, x, y, width, height) in placements.items():
+        sheets[sheet].fill((0, 0, 0, 0), (x, y, width, height))
+        sheets[sheet].blit(images[name], (x, y), special_flags=pygame.BLEND_RGBA_ADD)
+
+    sheet_names = []
+    for index, sheet in enumerate(sheets):
+        sheet_name = 'atlas{0}.png'.format(index)
+        pygame.image.save(sheet, os.path.join(SPRITE_FOLDER, sheet_name))
+        sheet_names.append(sheet_name)
+
+    with open(os.path.join(SPRITE_FOLDER, INDEX_FILE), 'w') as outfile:
+        json.dump({'sheets': sheet_names, 'sprites': placements}, outfile, indent=1, sort_keys=True)
+
+    print('Packed {0} sprites onto {1} sheet(s)'.format(len(placements), len(sheet_names)))
+
+
+if __name__ == '__main__':
+    build_atlas()
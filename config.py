@@ -16,7 +16,8 @@ Because of this, any changes made to this file will not take place
 until the old settings file is deleted.
 
 Likewise, any options that you add will cause a KeyError until the
-settings file that does not include the new options is deleted.
+settings file that does not include the new options is deleted,
+unless they are given a default with settings.setdefault below.
 
 >> DEBUG <<
 if True -
@@ -27,6 +28,29 @@ lets the user go into God Mode
 
 This is meant to test world generation and enemy effects
 in a way that allows the user to remain alive indefinitely.
+
+>> GENERATOR_VERSION <<
+1 (default) - worlds are generated the way they always have been,
+so every saved seed still gives the same world.
+2 - rooms are picked from precomputed tables, in one draw per room.
+Much faster for long worlds, but seeds give different worlds than in version 1.
+
+>> RENDERER <<
+'software' (default) - everything is blitted onto the display surface.
+'texture' - sprites are uploaded to the graphics card once and drawn by
+the SDL2 renderer. Needs pygame 2. See renderer.py
+
+>> UPSCALE <<
+if True -
+the game is rendered at SCREEN_RESOLUTION, and SDL stretches each frame
+to fill a window of WINDOW_RESOLUTION.
+If WINDOW_RESOLUTION is None, the window is the largest whole multiple
+of SCREEN_RESOLUTION that fits the desktop.
+
+SCREEN_RESOLUTION decides how much of the world is shown, as tiles and
+text are always the same number of pixels. Lowering it shows less of the
+world, larger - it does not draw the same view with fewer pixels.
+Works with either RENDERER.
 """
 import logging
 import json
@@ -35,6 +59,11 @@ module_logger = logging.getLogger('mineEye.config')
 
 #Defaults:
 SCREEN_RESOLUTION = (1366, 768)
+UPSCALE = False
+WINDOW_RESOLUTION = None
+RENDERER = 'software'
+
+GENERATOR_VERSION = 1
 
 DEBUG = True
 
@@ -71,6 +100,15 @@ except FileNotFoundError:
     with open('settings.txt', 'w') as outfile:
         json.dump(settings, outfile)
 
+settings.setdefault('UPSCALE', UPSCALE)
+settings.setdefault('WINDOW_RESOLUTION', WINDOW_RESOLUTION)
+settings.setdefault('RENDERER', RENDERER)
+settings.setdefault('GENERATOR_VERSION', GENERATOR_VERSION)
+
+# Always follow SCREEN_RESOLUTION, so that changing it in the settings file is enough
+settings['WIDTH'], settings['HEIGHT'] = settings['SCREEN_RESOLUTION']
+settings['CENTER'] = (settings['WIDTH']/2, settings['HEIGHT']/2)
+
 settings['GOD MODE'] = False
 settings['SHOW_NODES'] = SHOW_NODES
 settings['DEBUG'] = DEBUG
\ No newline at end of file
@@ -23,6 +23,11 @@ MOVE_RIGHT = 0
 MOVE_LEFT = 1
 MOVE_DOWN = 2
 
+# World generation
+MAX_ROOMS_IN_A_ROW = {MOVE_RIGHT: 5, MOVE_LEFT: 5, MOVE_DOWN: 3}  # rooms moving the same direction
+REPEAT_ROOM_ODDS = (6, 11)  # chance of a room being allowed to follow itself, in every generator version
+WEAPON_FACTOR = 6  # tenths of a percent chance of spawning a weapon at a given node
+
 # Sizes
 HP_BAR_WIDTH = 1/6
 HP_BAR_HEIGHT = 1/16
@@ -35,4 +40,8 @@ MELEE_POS_X = 1/8
 MELEE_POS_Y = 1/12
 
 RANGED_POS_X = 1/7
-RANGED_POS_Y = 1/12
\ No newline at end of file
+RANGED_POS_Y = 1/12
+
+# Rendering
+TERRAIN_CHUNK_SIZE = 16  # tiles along each side of a pre-rendered terrain chunk
+ANIMATION_FRAME_TICKS = 12  # game ticks each frame of animation is shown for
@@ -1,18 +1,18 @@
 """
 Exports the Enemy classes that the Hero has to battle.
 """
-import os
 import logging
 from math import sin, cos, tan, atan, pi
 import pygame
-from dependencies import pyganim
 import helpers as h
 from config import settings
-import constants
 import entities
 
 module_logger = logging.getLogger('mineEye.enemy')
 
+# Animations shared by every enemy of a type, stored by enemy name
+_animations = {}
+
 
 class Enemy(h.Sprite):
     """
@@ -98,7 +98,6 @@ class Enemy(h.Sprite):
         self.path = None
 
         self.animation_obj = {}
-        self.conductor = None
 
         self.create_animation_dict()
 
@@ -114,29 +113,40 @@ class Enemy(h.Sprite):
         self.logger.info('{enemy} damaged by {amount}'.format(enemy=self, amount=amount))
         self.current_hp -= amount
 
-    def create_animation_dict(self):
+    def load_animations(self):
         """
-        Create the animation object and the conductor to run the animations.
+        Get the animations for this type of enemy.
 
-        For more details, see the hero.create_animation_dict()
+        The frames are loaded, converted to the display format, and flipped for moving left
+        only for the first enemy of a type. Every later enemy shares the same surfaces.
 
-        Thanks to the pyganim example code for the basis of thsi code
+        :returns animations: A dictionary of animation name: Animation
         """
+        global _animations
+        animations = _animations.get(self.name)
 
-        self.logger.debug('Creating animation dict for {0}'.format(self))
+        if animations is None:
+            self.logger.debug('Loading animations for {0}'.format(self.name))
 
-        movement = [(os.path.join('Sprites', self.name, '{num}.png'.format(num=num)), 0.1)
-                    for num in range(2)]
+            move_right = [h.load('{num}.png'.format(num=num), self.name) for num in range(2)]
 
-        self.animation_obj['move_right'] = pyganim.PygAnimation(movement)
-        self.animation_obj['move_right'].convert()
-        self.animation_obj['move_right'].set_colorkey(constants.COLORKEY)
+            animations = {'move_right': h.Animation(move_right)}
+            animations['move_left'] = animations['move_right'].flipped()
+            _animations[self.name] = animations
 
-        self.animation_obj['move_left'] = self.animation_obj['move_right'].getCopy()
-        self.animation_obj['move_left'].flip(True, False)
-        self.animation_obj['move_left'].makeTransformsPermanent()
+        return animations
 
-        self.conductor = pyganim.PygConductor(self.animation_obj)
+    def create_animation_dict(self):
+        """
+        Create the animation object to run the animations.
+
+        Animations are driven by the game tick, so every enemy of the same type
+        shares the same Animation objects and holds no playback state of its own.
+        For more details, see the hero.create_animation_dict()
+
+        Thanks to the pyganim example code for the basis of thsi code
+        """
+        self.animation_obj = self.load_animations()
 
     def ranged_attack(self, hero):
         """
@@ -405,20 +415,19 @@ class Enemy(h.Sprite):
                 hero.actual_speed += 2
                 hero.speed_boost_counter = 1
 
-    def draw(self, screen):
+    def get_image(self, tick):
         """
-        Draw the animated enemy to the screen
+        Return the frame of animation to show, facing the hero
 
-        :param screen: The screen to draw to
+        :param tick: The game tick being drawn, which picks the frame of animation
         """
 
         hero_x = settings['SCREEN_RESOLUTION'][0]/2
 
-        self.conductor.play()
         if self.rect.centerx >= hero_x:
-            self.animation_obj['move_left'].blit(screen, self.rect)
+            return self.animation_obj['move_left'].get_frame(tick)
         else:
-            self.animation_obj['move_right'].blit(screen, self.rect)
+            return self.animation_obj['move_right'].get_frame(tick)
 
 
 class Volcano(Enemy):
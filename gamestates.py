@@ -32,14 +32,15 @@ import pygame
 from dependencies.PathGetter import PathGetter
 from config import settings
 import constants as c
-import rooms as r
 import helpers as h
 import world
+import worldgen
+import worldcache
+import seedstore
 import hero
 import upgrades
 
 module_logger = logging.getLogger('mineEye.gamestates')
-seeds = h.load_seed_file()
 
 
 class GameState:
@@ -53,12 +54,25 @@ class GameState:
     background_tile = 'menubg.png'
 
     def __init__(self):
-        self.default_background = h.create_background(h.load(self.background_tile))
+        # Set whenever the screen may be showing something other than this state
+        self.full_redraw = True
+
+    def enter(self):
+        """
+        A blank method called by GameStateManager whenever this state becomes the current state.
+
+        Meant to be overwritten to start work that is only worth doing once the state is shown,
+        rather than whenever it is created.
+        """
+        pass
 
     def draw(self, screen):
         """
         Will be overwritten by the subclass to draw whatever is on the screen.
         An exception will be raised when something not currently working is called
+
+        Subclasses may return a list of the rects that changed this frame, in which case
+        run.py only updates those regions of the display. Returning None updates all of it.
         :param screen: The pygame screen to be drawn on
         """
         raise NotImplementedError
@@ -68,12 +82,15 @@ class GameState:
         Draw a cursor to the screen
 
         :param screen: the screen to draw to
+        :returns cursor_rect: the rect the cursor was drawn to
         """
         cursor = h.load('cursor.png')
         cursor_rect = cursor.get_rect()
         cursor_rect.center = pygame.mouse.get_pos()
         screen.blit(cursor, cursor_rect)
 
+        return cursor_rect
+
     def update(self):
         """
         Will be overwritten by the subclass to update whatever is on the screen.
@@ -124,6 +141,8 @@ class GameStateManager:
 
         self.state = gamestate
         self.state.manager = self
+        self.state.full_redraw = True
+        self.state.enter()
 
         if gamestate.musicfile and settings['PLAY_MUSIC']:
             h.play_music(gamestate.musicfile)
@@ -136,6 +155,8 @@ class GameStateManager:
         """
         if self.previous_state is not None:
             self.state = self.previous_state
+            self.state.full_redraw = True
+            self.state.enter()
         else:
             self.go_to(TitleScreen())
         self.previous_state = None
@@ -154,6 +175,8 @@ class Menu(GameState):
     show_back_button = True
     show_on_off = False
 
+    seed_tag = None  # the tag given to seeds saved from this menu
+
     def __init__(self):
         super().__init__()
         self.manager = None
@@ -167,6 +190,11 @@ class Menu(GameState):
 
         self.rect_list = []
 
+        # The static parts of the menu, and the regions drawn over them last frame
+        self.layout = None
+        self.layout_key = None
+        self.overlay_rects = []
+
     def extra_draw(self, screen):
         """
         A blank draw method called in the main draw function.
@@ -181,9 +209,44 @@ class Menu(GameState):
     def draw(self, screen):
         """
         Draw the title and all the options/descriptions to the screen.
+
+        The static parts of the menu are only redrawn when they change. Otherwise
+        the regions under last frame's selection indicator and cursor are restored
+        from self.layout, and only those regions are reported as changed.
         :param screen: The pygame screen on which to draw
+        :returns dirty_rects: A list of the rects on screen that changed this frame
+        """
+        if self.full_redraw or self.get_layout_key(screen) != self.layout_key:
+            self.draw_layout(screen)
+            self.layout = screen.copy()
+            self.layout_key = self.get_layout_key(screen)
+            self.full_redraw = False
+            dirty_rects = [screen.get_rect()]
+        else:
+            for rect in self.overlay_rects:
+                screen.blit(self.layout, rect, rect)
+            dirty_rects = self.overlay_rects
+
+        self.overlay_rects = [self.draw_selection_indicator(screen),
+                              self.draw_cursor(screen)]  # inherited from GameState
+
+        return dirty_rects + self.overlay_rects
+
+    def get_layout_key(self, screen):
+        """
+        Return a value that changes whenever the static parts of the menu need to be redrawn
         """
+        on_off = None
+        if self.show_on_off and self.selections is not None:
+            on_off = tuple(settings.get(option) for option in self.selections if isinstance(option, str))
+
+        return screen.get_size(), tuple(self.options), tuple(self.descriptions or ()), on_off
 
+    def draw_layout(self, screen):
+        """
+        Draw everything in the menu that doesn't move with the selection or the mouse.
+        :param screen: The pygame screen on which to draw
+        """
         self.draw_background(screen)
 
         if not self.rect_list:
@@ -197,29 +260,21 @@ class Menu(GameState):
         if self.show_back_button:
             self.draw_back_button(screen)
 
-        self.draw_selection_indicator(screen)
         self.extra_draw(screen)
-        self.draw_cursor(screen)  # inherited from GameState
 
     def draw_background(self, screen):
         """
         draw the background
         """
-        if self.default_background.get_size() != screen.get_size():
-            self.default_background = h.create_background(h.load(self.background_tile))
-        screen.blit(self.default_background, (0, 0))
+        h.blit_background(screen, self.background_tile)
 
     def draw_on_off(self, screen):
         """
         Draw the on/off labels beside settings
         """
-        on = h.load_font('melma.ttf', 16).render(
-            'On', 1, c.BLACK
-        )
+        on = h.render_text(h.load_font('melma.ttf', 16), 'On', c.BLACK)
 
-        off = h.load_font('melma.ttf', 16).render(
-            'Off', 1, c.BLACK
-        )
+        off = h.render_text(h.load_font('melma.ttf', 16), 'Off', c.BLACK)
         try:
             for index, option in enumerate(self.selections):
                 try:
@@ -246,13 +301,13 @@ class Menu(GameState):
         selected_rect.bottomleft = self.rect_list[self.selected].bottomright
         screen.blit(selected_indicator, selected_rect)
 
+        return selected_rect
+
     def draw_back_button(self, screen):
         """
         draw a back button and append 'go back' to the list of options
         """
-        back_button = h.load_font('melma.ttf', 20).render(
-            'Back', 1, c.BLACK
-        )
+        back_button = h.render_text(h.load_font('melma.ttf', 20), 'Back', c.BLACK)
         back_rect = back_button.get_rect()
         back_rect.bottomleft = (0, settings['HEIGHT'])
 
@@ -285,21 +340,9 @@ class Menu(GameState):
 
             else:
                 try:
-                    new_seed = selected_option[5:]
-                    int(new_seed)  # Purely to prove that we ARE dealing with a seed and move out of the "try:" if not
-                    found = False
-                    for index, current_seed in enumerate(seeds):
-                        if current_seed == '' and not found:
-                            self.add_seed(index, new_seed)
-                            found = True
-                    else:
-                        if found:
-                            self.manager.go_to(TitleScreen())
-                        else:
-                            self.logger.INFO('Tried to add seed {0}, but there were no available slots'.format(new_seed))
-                            self.manager.go_to(TitleScreen(
-                                error='Tried to add seed {0}, but there were no available slots'.format(new_seed))
-                            )
+                    new_seed = int(selected_option[5:])  # Raises ValueError and moves out of the "try:" if not a seed
+                    self.save_seed(new_seed)
+                    self.manager.go_to(TitleScreen())
 
                 except ValueError:
                     self.toggle_setting(selected_option)
@@ -310,15 +353,20 @@ class Menu(GameState):
         except AttributeError:  # Selected option is None
             pass
 
-    def add_seed(self, index, seed):
+    def save_seed(self, seed):
         """
-        Add a seed to the seeds list at a given index and store it
+        Save a seed to the seed store, tagged with self.seed_tag
         """
-        global seeds
+        seedstore.add_seed(seed, self.seed_tag)
 
-        seeds[index] = seed
-        with open('seeds.txt', 'w') as f:
-            json.dump(seeds, f)
+    def edit_selected(self):
+        """
+        A blank method called when the player asks to change the selected option,
+        with a right click or backspace.
+
+        Meant to be overwritten by menus with options that can be changed.
+        """
+        pass
 
     def toggle_setting(self, setting):
         """
@@ -353,8 +401,7 @@ class Menu(GameState):
                     self.select_option()
 
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
-            if self.title == 'Custom Seeded Maps':
-                self.manager.go_to(AddSeed(self.selected))
+            self.edit_selected()
 
     def handle_keyboard(self, event):
         """
@@ -381,8 +428,8 @@ class Menu(GameState):
                         event.key == pygame.K_RIGHT or event.key == pygame.K_RETURN:
                 self.select_option()
 
-            if self.title == 'Custom Seeded Maps' and event.key == pygame.K_BACKSPACE:
-                self.manager.go_to(AddSeed(self.selected))
+            if event.key == pygame.K_BACKSPACE:
+                self.edit_selected()
 
 
 class TitleScreen(Menu):
@@ -402,72 +449,118 @@ class TitleScreen(Menu):
         self.error = error
         self.selections = [InGame(seed=h.generate_seed()), PlayerMaps(), ChooseReplay(), ChangeSettings(), Quit()]
 
+    def enter(self):
+        """
+        Start generating the new world in the background while the player is in the menu
+        """
+        self.selections[0].pregenerate_world()
+
     def extra_draw(self, screen):
         """
         Draw errors to the screen
         """
         if self.error is not None:
-            errmsg = h.load_font('melma.ttf', 16).render(self.error, 1, c.BLACK)
+            errmsg = h.render_text(h.load_font('melma.ttf', 16), self.error, c.BLACK)
             screen.blit(errmsg, (5, 5))
 
 
 class PlayerMaps(Menu):
     """
-    A place for the player to store maps based on certain seeds. (page 1)
+    A place for the player to store maps based on certain seeds.
 
     This helps with speed running by allowing the user to save/add
     certain "good" maps to more directly compare skill to other players.
+
+    Seeds are kept by seedstore, and listed a page at a time.
+    Tab changes how the seeds are sorted or filtered, going through every order
+    in seedstore.ORDERS and then the newest seeds with each tag.
     """
     title = 'Custom Seeded Maps'
-    descriptions = ['', '', '', '', '', 'right click or use backspace to change an existing seed']
-    options = ['EMPTY'] * 5
-    options.append('NEXT PAGE')
+    page_size = 4
 
-    def __init__(self):
+    def __init__(self, page=0, view=0):
+        """
+        :param page: The Int number of the page to show, starting from 0
+        :param view: The Int index in get_views() of how to sort and filter the seeds
+        """
         super().__init__()
-        self.options = ['EMPTY'] * 5
-        self.options.append('NEXT PAGE')
-        for index, seed in enumerate(seeds):
-            if index < 5:
-                if seed != '':
-                    self.options[index] = seed
-
-        self.selections = []
-        for index, option in enumerate(self.options):
-            if option == 'EMPTY':
-                self.selections.append(AddSeed(index))
-            elif option == 'NEXT PAGE':
-                self.selections.append(PlayerMaps2())
-            else:
-                self.selections.append(InGame(seed=int(option)))
+        self.page = page
+
+        views = self.get_views()
+        self.view = view % len(views)
+        order, tag = views[self.view]
+
+        rows = seedstore.get_page(self.page, self.page_size, order, tag)
+        self.seeds = [row['seed'] for row in rows[:self.page_size]]
+
+        self.options = ['ADD SEED'] + [str(seed) for seed in self.seeds]
+        self.descriptions = [''] + [self.describe_seed(row) for row in rows[:self.page_size]]
+        self.selections = [AddSeed()] + [InGame(seed=seed) for seed in self.seeds]
+
+        if len(rows) > self.page_size:
+            self.options.append('NEXT PAGE')
+            self.selections.append('next page')
+            self.descriptions.append('')
+        elif self.page > 0:
+            self.options.append('FIRST PAGE')
+            self.selections.append('first page')
+            self.descriptions.append('')
+
+        view_name = order if tag is None else '{0} - {1}'.format(order, tag)
+        self.descriptions[-1] += '   page {0} - {1} (tab to change) - right click or use backspace ' \
+                                 'to change a seed'.format(self.page + 1, view_name)
+        self.list_size = len(self.options) - 1
 
+    @staticmethod
+    def get_views():
+        """
+        :returns views: A list of (order, tag) tuples, every way the seeds can be listed
+        """
+        return [(order, None) for order in seedstore.ORDERS] + [('newest', tag) for tag in seedstore.get_tags()]
 
-class PlayerMaps2(Menu):
-    """
-    A place for the player to store maps based on certain seeds. (page 2)
+    @staticmethod
+    def describe_seed(row):
+        """
+        :param row: The seed's row from seedstore.get_page
+        :returns description: A string showing the seed's best time and metrics
+        """
+        if row['best_time'] is not None:
+            best_time = 'best {0}'.format(h.format_time(row['best_time']))
+        else:
+            best_time = 'not won'
 
-    This helps with speed running by allowing the user to save/add
-    certain "good" maps to more directly compare skill to other players.
-    """
-    title = 'Custom Seeded Maps'
-    descriptions = ['', '', '', '', '', 'right click or use backspace to change an existing seed']
-    options = ['EMPTY'] * 5
-    options.append('LAST PAGE')
+        return '{0} - path {1} - {2} weapons'.format(best_time, row['path_length'], row['weapons'])
 
-    def __init__(self):
-        super().__init__()
-        self.options = ['EMPTY'] * 6
-        for index, seed in enumerate(seeds):
-            if index > 4:
-                if seed != '':
-                    self.options[index - 5] = seed
-
-        self.selections = []
-        for index, option in enumerate(self.options):
-            if option == 'EMPTY':
-                self.selections.append(AddSeed(index + 5))
-            else:
-                self.selections.append(InGame(seed=int(option)))
+    def select_option(self):
+        """
+        Change pages, otherwise select the option as normal
+        """
+        selected_option = self.selections[self.selected]
+        if selected_option in ('next page', 'first page'):
+            if settings['PLAY_SFX']:
+                self.beep.play()
+
+            page = self.page + 1 if selected_option == 'next page' else 0
+            self.manager.go_to(PlayerMaps(page, self.view))
+
+        else:
+            super().select_option()
+
+    def edit_selected(self):
+        """
+        Change the selected seed
+        """
+        if 0 < self.selected <= len(self.seeds):
+            self.manager.go_to(AddSeed(self.seeds[self.selected - 1]))
+
+    def handle_keyboard(self, event):
+        """
+        Change how the seeds are listed with tab, otherwise handle the key as normal
+        """
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+            self.manager.go_to(PlayerMaps(0, self.view + 1))
+        else:
+            super().handle_keyboard(event)
 
 
 class AddSeed(Menu):
@@ -479,11 +572,14 @@ class AddSeed(Menu):
 
     show_back_button = False
 
-    def __init__(self, index):
+    def __init__(self, seed=None):
+        """
+        :param seed: The saved seed to change, or None to add a new one
+        """
         super().__init__()
         self.modifying = False
-        self.index = index
-        self.seed = str(seeds[self.index])
+        self.old_seed = seed
+        self.seed = str(seed) if seed is not None else ''
         self.descriptions = [self.seed, ""]
 
     def select_option(self):
@@ -494,13 +590,14 @@ class AddSeed(Menu):
             self.options[self.selected] = ">" + self.options[self.selected] + "<"
             self.modifying = True
         else:
-            global seeds
             if self.options[0][0] == ">":
                 self.options[0] = self.options[0][1:-1]
 
-            seeds[self.index] = self.seed
-            with open('seeds.txt', 'w') as f:
-                json.dump(seeds, f)
+            # Clearing a seed removes it
+            if self.old_seed is not None and self.seed != str(self.old_seed):
+                seedstore.remove_seed(self.old_seed)
+            if self.seed:
+                self.save_seed(int(self.seed))
             self.manager.go_to(PlayerMaps())
 
     def handle_keyboard(self, event):
@@ -535,7 +632,9 @@ class AddSeed(Menu):
                     if event.key in [pygame.K_0, pygame.K_1, pygame.K_2, pygame.K_3,
                                  pygame.K_4, pygame.K_5, pygame.K_6, pygame.K_7,
                                  pygame.K_8, pygame.K_9]:
-                        self.seed += pygame.key.name(event.key)
+                        # Ignore digits that would make the seed too large to save
+                        if int(self.seed + pygame.key.name(event.key)) <= seedstore.MAX_SEED:
+                            self.seed += pygame.key.name(event.key)
         else:
             pass
 
@@ -590,6 +689,7 @@ class ChangeBinds(Menu):
         super().__init__()
 
         self.modifying = False
+        self.rng = random.Random()  # Picks keys for options that lose theirs
         try:
             self.descriptions = [pygame.key.name(settings[option]) for option in self.selections]
         except KeyError: # go back
@@ -661,7 +761,7 @@ class ChangeBinds(Menu):
                                                        [settings[selection] for selection in self.selections
                                                         if selection != 'go back']]
 
-                                            new_key = random.choice(unbound)
+                                            new_key = self.rng.choice(unbound)
                                             settings[selection] = new_key
                                     except KeyError:  # 'go back'
                                         pass
@@ -711,13 +811,14 @@ class InGame(GameState):
         3 right moving rooms in a row.
     """
 
-    def __init__(self, seed, chosen_hero=None, replay_location=None, loop_count=0, tick=0):
+    def __init__(self, seed, chosen_hero=None, replay_location=None, loop_count=0, tick=0, built_world=None):
         """
         Instantiate the primary Game State.
 
         :param timer: A boolean. True if a timer is to be displayed in the top right, False if not.
         :param seed: The seed to use to generate the world.
         :param chosen_hero: The hero who will enter the world.
+        :param built_world: The world from the last loop of the same seed, to reset instead of building it again.
         """
 
         super().__init__()
@@ -739,13 +840,16 @@ class InGame(GameState):
         self.tick_count = tick
         self.start_time = time.strftime('%a %d %b %Y - %H %M %S')
 
-        self.world = None
+        self.world = built_world
 
         self.left_pressed = False
         self.right_pressed = False
 
         self.show_circle = False
 
+        # Rendered HUD pieces, stored as name: (displayed value, surface)
+        self.hud_cache = {}
+
         if replay_location:
             self.replay = True
         else:
@@ -756,6 +860,16 @@ class InGame(GameState):
                 self.replay_list = [line for line in somefile]
 
         self.event_list = []
+        self.recorder = None
+
+    def pregenerate_world(self):
+        """
+        Start generating the world in the background, so that it is ready when the game is entered.
+
+        Worlds that are already stored by worldcache are left to be loaded.
+        """
+        if self.world is None and not os.path.exists(worldcache.get_cache_path(self.seed, self.room_number)):
+            worldgen.pregenerate(self.seed, self.room_number)
 
     def enter_world(self):
         """
@@ -765,54 +879,40 @@ class InGame(GameState):
         multiple instances of GameState existing at once.
         """
         self.logger.info('--====NEW WORLD====--')
-        self.create_world(self.room_number)
+        if self.world is not None:
+            self.world.reset()
+        else:
+            self.create_world(self.room_number)
         self.hero.world = self.world
 
     def draw_hud(self, screen):
         """
         Draw the user Heads Up Display to the screen, includes HP, timer, Ammo, etc.
 
+        Every piece of the HUD is cached, and only re-rendered when the value it shows changes.
+        The timer is built from pre-rendered digits instead.
+
         If the timer ends, go to WinScreen.
         :param screen: The screen on which to draw
         """
 
         # Draw the HP Bar
-        hp_background = pygame.Surface((int(c.HP_BAR_WIDTH*settings['WIDTH']), int(c.HP_BAR_HEIGHT*settings['HEIGHT'])))
-        hp_background.fill(c.BLACK)
-        hp_background_rect = hp_background.get_rect()
-        hp_background_rect.x = 2
-        hp_background_rect.y = 2
-        screen.blit(hp_background, hp_background_rect)
-
-        hp_bar = pygame.Surface(
-            (int((c.HP_BAR_WIDTH*settings['WIDTH'] - 4) * self.hero.hp/self.hero.base_hp),
-             int(c.HP_BAR_HEIGHT*settings['HEIGHT'] - 4)
-            )
-        )
-
-        if self.hero.hp/self.hero.base_hp > .25:
-            hp_bar.fill(c.BLUE)
-        else:
-            hp_bar.fill(c.RED)
-
-        hp_bar_rect = hp_bar.get_rect()
-        hp_bar_rect.centery = hp_background_rect.centery
-        hp_bar_rect.left = hp_background_rect.left + 2
-
-        screen.blit(hp_bar, hp_bar_rect)
+        hp = (self.hero.hp, self.hero.base_hp)
+        hp_bar = self.get_hud_piece('hp bar', hp, self.render_hp_bar)
+        screen.blit(hp_bar, (2, 2))
 
         # Draw the HP text
-        hp_text = h.load_font('luximb.ttf', 32).render(
-            "{0}/{1}".format(self.hero.hp, self.hero.base_hp), 1, c.WHITE
-        )
+        hp_text = self.get_hud_piece('hp text', hp, lambda value: h.load_font('luximb.ttf', 32).render(
+            "{0}/{1}".format(*value), 1, c.WHITE
+        ))
         hp_text_rect = hp_text.get_rect()
-        hp_text_rect.center = hp_background_rect.center
+        hp_text_rect.center = hp_bar.get_rect(topleft=(2, 2)).center
         screen.blit(hp_text, hp_text_rect)
 
         # Draw the number of bombs
-        bomb_ammo = h.load_font('luximb.ttf', 32).render(
-            "Bombs: {0}".format(self.hero.bombs), 1, c.WHITE
-        )
+        bomb_ammo = self.get_hud_piece('bombs', self.hero.bombs, lambda value: h.load_font('luximb.ttf', 32).render(
+            "Bombs: {0}".format(value), 1, c.WHITE
+        ))
         screen.blit(bomb_ammo, (c.BOMB_POS_X*settings['WIDTH'], c.BOMB_POS_Y*settings['HEIGHT']))
 
         # Draw the equipped weapons
@@ -824,28 +924,77 @@ class InGame(GameState):
             screen.blit(self.hero.ranged_weapon.top_sprite.image,
                         (c.RANGED_POS_X*settings['WIDTH'], c.RANGED_POS_Y*settings['HEIGHT']))
 
-        # Draw the timer
+        # Draw the timer from pre-rendered digits, since it changes every tick
         if self.world.run_timer:
-            partials = self.tick_count % 60
-            seconds = ((self.tick_count - partials) // 60) % 60
-            minutes = (((self.tick_count - partials) // 60) - seconds) // 60
-
-            if len(str(partials)) != 2:
-                partials = "0" + str(partials)
-            if len(str(seconds)) != 2:
-                seconds = "0" + str(seconds)
-            if len(str(minutes)) != 2:
-                minutes = "0" + str(minutes)
-            formatted_elapsed_time = "{minutes}:{seconds}:{partials}".format(minutes=minutes, seconds=seconds, partials=partials)
-
-            elapsed_time_display = h.load_font('luximb.ttf', 32).render(
-                "{ElapsedTime}".format(ElapsedTime=formatted_elapsed_time), 1, c.WHITE
-            )
+            formatted_elapsed_time = h.format_time(self.tick_count)
+            glyphs = h.load_glyphs('luximb.ttf', 32, c.WHITE)
 
-            elapsed_rect = elapsed_time_display.get_rect()
+            elapsed_rect = h.get_glyph_rect(formatted_elapsed_time, glyphs)
             elapsed_rect.top = 0
             elapsed_rect.right = settings['WIDTH']
-            screen.blit(elapsed_time_display, elapsed_rect)
+            h.blit_glyphs(formatted_elapsed_time, glyphs, screen, elapsed_rect.topleft)
+
+    def get_hud_piece(self, name, value, render):
+        """
+        Return a rendered piece of the HUD, re-rendering it only if the value it shows has changed.
+
+        :param name: A string naming the piece of the HUD
+        :param value: The value shown by the piece, compared against the cached value
+        :param render: A function taking value and returning a pygame surface
+        :returns surface: The cached or newly rendered surface
+        """
+        cached_value, surface = self.hud_cache.get(name, (None, None))
+        if surface is None or cached_value != value:
+            surface = render(value)
+            self.hud_cache[name] = (value, surface)
+
+        return surface
+
+    def render_melee_range(self, radius):
+        """
+        Render the circle showing the reach of the hero's melee weapon.
+
+        :param radius: The reach of the weapon in px
+        :returns circle: A pygame surface with the circle drawn on it
+        """
+        circle = pygame.Surface((2*radius, 2*radius)).convert()
+        circle.fill(c.COLORKEY)
+        circle.set_colorkey(c.COLORKEY)
+        pygame.draw.circle(circle, c.BLACK, (radius, radius), radius)
+
+        return circle
+
+    def render_hp_bar(self, hp):
+        """
+        Render the HP bar - a black background with a colored bar showing the fraction of HP left.
+
+        :param hp: A tuple of the hero's current hp and base hp
+        :returns hp_background: A pygame surface with the bar drawn on it
+        """
+        current_hp, base_hp = hp
+
+        hp_background = pygame.Surface((int(c.HP_BAR_WIDTH*settings['WIDTH']), int(c.HP_BAR_HEIGHT*settings['HEIGHT'])))
+        hp_background.fill(c.BLACK)
+        hp_background_rect = hp_background.get_rect()
+
+        hp_bar = pygame.Surface(
+            (int((c.HP_BAR_WIDTH*settings['WIDTH'] - 4) * current_hp/base_hp),
+             int(c.HP_BAR_HEIGHT*settings['HEIGHT'] - 4)
+            )
+        )
+
+        if current_hp/base_hp > .25:
+            hp_bar.fill(c.BLUE)
+        else:
+            hp_bar.fill(c.RED)
+
+        hp_bar_rect = hp_bar.get_rect()
+        hp_bar_rect.centery = hp_background_rect.centery
+        hp_bar_rect.left = hp_background_rect.left + 2
+
+        hp_background.blit(hp_bar, hp_bar_rect)
+
+        return hp_background
 
     def draw(self, screen):
         """
@@ -855,26 +1004,22 @@ class InGame(GameState):
         Additionally, a HUD is displayed at the top of the screen.
         :param screen: The pygame screen on which to draw.
         """
-        self.world.draw(screen)
-        self.hero.draw(screen)
+        self.world.draw(screen, self.tick_count)
+        self.hero.draw(screen, self.tick_count)
         self.draw_hud(screen)
         self.draw_cursor(screen)  # inherited from GameState
 
         if self.show_circle:
             try:
-                pygame.draw.circle(screen, (0, 0, 0, 100), self.hero.rect.center,
-                                   int(self.hero.melee_range_multiplier*self.hero.melee_weapon.range))
+                radius = int(self.hero.melee_range_multiplier*self.hero.melee_weapon.range)
+                circle = self.get_hud_piece('melee range', radius, self.render_melee_range)
+                screen.blit(circle, circle.get_rect(center=self.hero.rect.center))
                 self.show_circle = False
             except AttributeError:
                 pass
 
         if settings['SHOW_NODES']:
-            node_sprite = h.load('bullet.png')
-            node_pos = node_sprite.get_rect()
-
-            for node in self.world.nodes.nodes:
-                node_pos.center = node
-                screen.blit(node_sprite, node_pos)
+            self.world.draw_nodes(screen)
 
     def update(self):
         """
@@ -928,8 +1073,9 @@ class InGame(GameState):
         overwritten by the user inside of the Change Keybinds menu
         defined above as ChangeBinds()
 
-        The first bit of code is defining logging actions based on if
-        the user is playing, or if it's a replay.
+        Every event is logged, and added to the replay file by self.recorder
+        if the user is playing rather than watching a replay. The recorder is
+        created on the first tick, and kept until the hero dies or wins.
 
         Pushing Keys:
             Left:
@@ -955,73 +1101,30 @@ class InGame(GameState):
         """
 
         self.tick_count += 1
-        if not self.replay:
+        if not self.replay and self.recorder is None:
             file_name = "{time} - seed {seed}.txt".format(time=self.start_time, seed=self.seed)
-            f = open(os.path.join("replays", file_name), 'a')
-
-            def log_down(key):
-                self.logger.debug('pressed [{key}]'.format(key=key.upper()))
-                f.write('{tick} KeyDown {key}\n'.format(tick=self.tick_count, key=key))
-
-            def log_up(key):
-                self.logger.debug('released [{key}]'.format(key=key.upper()))
-                f.write('{tick} KeyUp {key}\n'.format(tick=self.tick_count, key=key))
-
-            def log_m1down(pos):
-                self.logger.debug('[Left Click Down] at {0}'.format(pos))
-                f.write('{tick} Mouse1Down {pos}\n'.format(tick=self.tick_count, pos=pos))
-
-            def log_m1up(pos):
-                self.logger.debug('[Left Click Up] at {0}'.format(pos))
-                f.write('{tick} Mouse1Up {pos}\n'.format(tick=self.tick_count, pos=pos))
-
-            def log_m2down(pos):
-                self.logger.debug('[Right Click Down] at {0}'.format(pos))
-                f.write('{tick} Mouse2Down {pos}\n'.format(tick=self.tick_count, pos=pos))
-
-            def log_m2up(pos):
-                self.logger.debug('[Right Click Up] at {0}'.format(pos))
-                f.write('{tick} Mouse2Up {pos}\n'.format(tick=self.tick_count, pos=pos))
-
-        else:
-            def log_down(key):
-                self.logger.debug('replay pressed [{key}]'.format(key=key.upper()))
-
-            def log_up(key):
-                self.logger.debug('replay released [{key}]'.format(key=key.upper()))
-
-            def log_m1down(pos):
-                self.logger.debug('replay pressed Left Click at {0}'.format(pos))
-
-            def log_m1up(pos):
-                self.logger.debug('replay released Left Click at {0}'.format(pos))
-
-            def log_m2down(pos):
-                self.logger.debug('replay pressed Right Click at {0}'.format(pos))
-
-            def log_m2up(pos):
-                self.logger.debug('replay released Right Click at {0}'.format(pos))
+            self.recorder = h.ReplayRecorder(os.path.join("replays", file_name))
 
         for event in events:
             if event.type == pygame.KEYDOWN:
                 if event.key == settings['LEFT']:
-                    log_down('Left')
+                    self.record_event('KeyDown', 'Left')
                     self.move_left()
 
                 elif event.key == settings['RIGHT']:
-                    log_down('Right')
+                    self.record_event('KeyDown', 'Right')
                     self.move_right()
 
                 elif event.key == settings['UP']:
-                    log_down('Up')
+                    self.record_event('KeyDown', 'Up')
                     self.jump()
 
                 elif event.key == settings['BOMB']:
-                    log_down('Bomb')
+                    self.record_event('KeyDown', 'Bomb')
                     self.throw_bomb()
 
                 elif event.key == settings['DOWN']:
-                    log_down('Down')
+                    self.record_event('KeyDown', 'Down')
                     self.pickup_weapon()
 
                 # Enter pause menu
@@ -1030,41 +1133,41 @@ class InGame(GameState):
                     self.pause()  # Pause menu or GOD MODE
 
                 elif event.key == pygame.K_j:
-                    log_m1down(pygame.mouse.get_pos())
+                    self.record_event('Mouse1Down', pygame.mouse.get_pos())
                     self.melee_attack()
 
             elif event.type == pygame.KEYUP:
                 if event.key == settings['LEFT']:
-                    log_up('Left')
+                    self.record_event('KeyUp', 'Left')
                     self.stop_moving_left()
 
                 elif event.key == settings['RIGHT']:
-                    log_up('Right')
+                    self.record_event('KeyUp', 'Right')
                     self.stop_moving_right()
 
                 elif event.key == settings['UP']:
-                    log_up('Up')
+                    self.record_event('KeyUp', 'Up')
 
                 elif event.key == settings['DOWN']:
-                    log_up('Down')
+                    self.record_event('KeyUp', 'Down')
 
                 elif event.key == settings['BOMB']:
-                    log_up('Bomb')
+                    self.record_event('KeyUp', 'Bomb')
 
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left Click
-                    log_m1down(event.pos)
+                    self.record_event('Mouse1Down', event.pos)
                     self.melee_attack()
 
                 elif event.button == 3:  # Right Click
-                    log_m2down(event.pos)
+                    self.record_event('Mouse2Down', event.pos)
 
             elif event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1:
-                    log_m1up(event.pos)
+                    self.record_event('Mouse1Up', event.pos)
 
                 elif event.button == 3:
-                    log_m2up(event.pos)
+                    self.record_event('Mouse2Up', event.pos)
 
             else:
                 pass
@@ -1072,8 +1175,25 @@ class InGame(GameState):
         if self.manager.replay:
             self.event_list.clear()
 
-        if not self.replay:
-            f.close()
+    def record_event(self, event_name, info):
+        """
+        Log an event, and add it to the replay unless this is a replay
+
+        :param event_name: The name of the event in the replay file, such as KeyDown or Mouse1Up
+        :param info: The key or position of the event
+        """
+        if self.replay:
+            self.logger.debug('replay {event} {info}'.format(event=event_name, info=info))
+        else:
+            self.logger.debug('{event} {info}'.format(event=event_name, info=info))
+            self.recorder.record(self.tick_count, event_name, info)
+
+    def close_replay(self):
+        """
+        Finish recording the replay, once the hero has died or reached the end of the world
+        """
+        if self.recorder is not None:
+            self.recorder.close()
 
     def jump(self):
         """
@@ -1240,6 +1360,8 @@ class InGame(GameState):
             self.logger.info('God Mode Activated')
         else:
             self.logger.debug('Go to PauseScreen')
+            if self.recorder is not None:
+                self.recorder.flush()  # The game may be left from the pause menu
             self.manager.go_to(PauseScreen(self.seed))
 
     def melee_attack(self):
@@ -1250,10 +1372,12 @@ class InGame(GameState):
         self.show_circle = True
 
     def die(self):
+        self.close_replay()
         self.manager.replay = False
         self.manager.go_to(DeathScreen(self))
 
     def win(self):
+        self.close_replay()
         if self.loop_count < self.loop_number:
             self.loop_count += 1
             self.manager.go_to(UpgradeScreen(self))
@@ -1263,240 +1387,33 @@ class InGame(GameState):
 
     def create_world(self, n):
         """
-        Generate the world and align the rooms.
-
-        :param n: number of rooms to generate, passed to generate_world
-        """
-
-        self.logger.info('========Generating World With Seed {seed}========'.format(seed=self.seed))
-        random.seed(self.seed)
-
-        room_list = self.generate_world(n)
-        aligned_rooms = self.align_doors(room_list)
-
-        self.logger.info('==============Complete World Generated!==============')
-
-        self.world = world.World(self.seed)
-        self.world.room_array = aligned_rooms
-
-        self.logger.info(' ')
-        for row in aligned_rooms:
-            self.logger.info(row.replace('&', ' '))
-
-        self.logger.info(' ')
-        self.logger.info('=====================================================')
-
-    def generate_world(self, n):
-        """
-        Generate the world by semi-randomly selecting n rooms.
-
-        Creates a list of rooms that gets turned into a list of strings inside
-        rooms.Room.parse_room_array()
-        From there, each character in the list of strings is turned into its
-        appropriate block.
-
-        * Make an empty list - room_list
-        * Make a list of the rooms to choose from (not StartingRoom and EndingRoom)
-        * Add StartingRoom to the beginning
-        * Create counters to remember how often we move to the right/left/down
-        * Create a total_displacement counter to prevent a bug
-            The bug is caused by having a net negative displacement,
-            i.e. the room need to generate blocks to the left of the leftmost
-            block in StartingRoom.
-            To mitigate this, total_displacement counts the number of blocks to the right
-            the current door is, and then compares it to how far left the room needs to
-            render itself. If the room needs to render too far to the left, a new room is
-            chosen
-        * Iterate n times through the list of possible rooms
-        * Using the game seed, randomly select a room on each pass
-        * If the selected room matches the selection criteria, add it to the list,
-        otherwise, try again with a different room.
-            * Criteria are as follows:
-                * Don't move in the same direction more than 5 times
-                * Don't move down more than 3 times
-                * If the same room is selected twice, generate a test value which must be greater than 5
-        * Finally, add the ending room
-
-        :param n: The Int number of rooms to randomly choose
-        """
-
-        room_list = []
-        possible_rooms = [v for k, v in sorted(r.room_dict.items())
-                          if k not in ["StartingRoom", "EndingRoom", "TransitionRoom"]]
-
-        room_list.append(r.room_dict["StartingRoom"])
-
-        move_down_counter = 0
-        move_left_counter = 0
-        move_right_counter = 0
-
-        self.logger.debug('Generating New World')
-
-        for i in range(n):
-            matched = False
-            self.logger.debug('======finding room {i}======'.format(i=i))
-            while not matched:
-                possible_next_room = random.choice(possible_rooms)
-                self.logger.debug('==new room==')
-                for row in possible_next_room:
-                    self.logger.debug(row)
-
-                if possible_next_room[0] == c.MOVE_DOWN:
-                    if move_down_counter <= 2:
-                        if possible_next_room == room_list[-1]:
-                            test = random.randint(0, 10)
-                            self.logger.debug('Same room repeated. (move down) Test={0}'.format(test))
-                            if test >= 5:
-                                room_list.append(possible_next_room)
-
-                                move_down_counter += 1
-                                move_left_counter = 0
-                                move_right_counter = 0
-
-                                matched = True
-                            else:
-                                self.logger.debug('DQ: Test is not greater than threshold')
-                        else:
-                            room_list.append(possible_next_room)
-
-                            move_down_counter += 1
-                            move_left_counter = 0
-                            move_right_counter = 0
-
-                            matched = True
-                    else:
-                        self.logger.debug('DQ: too many down in a row')
-
-                elif possible_next_room[0] == c.MOVE_LEFT:
-                    if move_left_counter <= 4:
-                        if possible_next_room == room_list[-1]:
-                            test = random.randint(0, 10)
-                            self.logger.debug('Same room repeated. (move left) Test={0}'.format(test))
-                            if test >= 5:
-                                room_list.append(possible_next_room)
-
-                                move_down_counter = 0
-                                move_left_counter += 1
-                                move_right_counter = 0
-
-                                matched = True
-                            else:
-                                self.logger.debug('DQ: Test is not greater than threshold')
-                        else:
-                            room_list.append(possible_next_room)
-
-                            move_down_counter = 0
-                            move_left_counter += 1
-                            move_right_counter = 0
-
-                            matched = True
-                    else:
-                        self.logger.debug('DQ: too many left in a row')
-
-                elif possible_next_room[0] == c.MOVE_RIGHT:
-                    if move_right_counter <= 4:
-                        if possible_next_room == room_list[-1]:
-                            test = random.randint(0, 10)
-                            self.logger.debug('Same room repeated. (move right) Test={0}'.format(test))
-                            if test >= 5:
-                                room_list.append(possible_next_room)
-
-                                move_down_counter = 0
-                                move_left_counter = 0
-                                move_right_counter += 1
-
-                                matched = True
-                            else:
-                                self.logger.debug('DQ: Test is not greater than threshold')
-                        else:
-                            room_list.append(possible_next_room)
-
-                            move_down_counter = 0
-                            move_left_counter = 0
-                            move_right_counter += 1
-
-                            matched = True
-                    else:
-                        self.logger.debug('DQ: too many right in a row')
-
-            self.logger.debug('move_down: {0}, move_left: {1}, move_right: {2}'.format(
-                move_down_counter, move_left_counter, move_right_counter))
+        Generate the world, align the rooms and fill the world in.
 
-            self.logger.debug('=======found room {i}======'.format(i=i))
+        Worlds are stored by worldcache once they are generated,
+        so a seed that has been played before is loaded instead of generated.
+        If the world has been pregenerated in the background, it is handed over by worldgen.get_layout.
 
-        room_list.append(r.room_dict["EndingRoom"])
-        self.logger.debug('===============WorldGen Complete===============')
-
-        return room_list
-
-    def align_doors(self, room_list):
-        """
-        Align all the doors to create a world that is solvable
-
-        * Cycle through the first door block at the bottom of the last room,
-        * Then find the first door block at the top of the new room,
-        * Finally add a bunch of blank characters (spaces) to offset the new room until
-            the doors line up
+        :param n: number of rooms to generate
         """
-        self.logger.debug('===Begin modifying rooms to align doors===')
-        room_array = []
-        for index, room in enumerate(room_list):
-            self.logger.debug(' ')
-            self.logger.debug('next room: {0}'.format(index))
-
-            room = room[1:]  # get rid of the leading "move right" identifier
-
-            for row in room:
-                self.logger.debug(row)
-
-            if len(room_array) == 0:
-                room_array += room
-
-            else:
-                #Find the position of the previous room's exit door
-                self.logger.debug(' ')
-                self.logger.debug('Previous room exit')
-                self.logger.debug(room_array[-1])
-
-                previous_door_location = room_array[-1].find('DD')
-                self.logger.debug("previous door location: {0}".format(previous_door_location))
-
-                #Find the position of the new room's entrance door
-                self.logger.debug(' ')
-                self.logger.debug('Current room entrance')
-                self.logger.debug(room[0])
-
-                new_door_location = room[0].find('DD')
-                self.logger.debug("new door location: {0}".format(new_door_location))
-
-
-                #Get the distance between the two doors
-                door_location = previous_door_location - new_door_location
-                self.logger.debug('net door location (prev - new): {0}'.format(door_location))
-
-                aligned_room = []
-                if door_location >= 0:
-                    self.logger.debug('---Adding spaces to the room to push it right---')
-                    self.logger.debug(room_array[-1])
-                    for row in room:
-                        # Add & (blank tile) to each row to line up its door with the previous room
-                        aligned_row = "&"*abs(door_location) + row
-                        aligned_room.append(aligned_row)
-
-                else:
-                    self.logger.debug('--Adding spaces to the rest of the world to relatively push the new one left---')
-                    for index2, row in enumerate(room_array):
-                        aligned_row = "&"*abs(door_location) + row
-                        room_array[index2] = aligned_row
-
-                    for row in room:
-                        aligned_room.append(row)
+        layout = worldcache.load_layout(self.seed, n)
+        if layout is not None:
+            self.logger.info('========Loaded Stored World With Seed {seed}========'.format(seed=self.seed))
+        else:
+            self.logger.info('========Generating World With Seed {seed}========'.format(seed=self.seed))
+            layout = worldgen.get_layout(self.seed, n)
+            worldcache.save_layout(layout, n)
 
-                room_array += aligned_room
+            self.logger.info('==============Complete World Generated!==============')
+            self.logger.info(' ')
+            for room, x_offset, y_offset in layout.placements:
+                for row in room.rows:
+                    self.logger.info(' ' * x_offset + row)
 
-        self.logger.debug('----====Finished World====----')
+            self.logger.info(' ')
+            self.logger.info('=====================================================')
 
-        return room_array
+        self.world = world.World(self.seed)
+        self.world.restore(layout)
 
 
 class DeathScreen(Menu):
@@ -1510,6 +1427,7 @@ class DeathScreen(Menu):
 
     title = "You Died!"
     options = ["Retry", "Save Seed", "Generate New World", "Quit"]
+    seed_tag = 'died'
 
     show_back_button = False
 
@@ -1524,10 +1442,14 @@ class DeathScreen(Menu):
                            TitleScreen()
         ]
 
+    def enter(self):
+        """
+        Start generating the new world in the background while the player is in the menu
+        """
+        self.selections[2].pregenerate_world()
+
     def extra_draw(self, screen):
-        seed_text = h.load_font("luximb.ttf", 16).render(
-            "SEED: {0}".format(self.seed), 1, c.BLUE
-        )
+        seed_text = h.render_text(h.load_font("luximb.ttf", 16), "SEED: {0}".format(self.seed), c.BLUE)
         seed_rect = seed_text.get_rect()
         seed_rect.right = settings['WIDTH']
         seed_rect.bottom = settings['HEIGHT']
@@ -1547,15 +1469,16 @@ class UpgradeScreen(Menu):
     def __init__(self, game):
         super().__init__()
         all_options = [k for k, v in sorted(upgrades.upgrades.items()) if k not in game.hero.upgrades]
-        random.seed(game.seed + game.loop_count)
-        self.options = random.sample(all_options, 3)
+        upgrade_rng = random.Random(game.seed + game.loop_count)
+        self.options = upgrade_rng.sample(all_options, 3)
         self.values = [upgrades.upgrades[key] for key in self.options]
         self.game = game
 
     def select_option(self):
         self.values[self.selected](self.game.hero)
         self.manager.go_to(InGame(seed=self.game.seed, chosen_hero=self.game.hero,
-                                  loop_count=self.game.loop_count, tick=self.game.tick_count))
+                                  loop_count=self.game.loop_count, tick=self.game.tick_count,
+                                  built_world=self.game.world))
 
 
 class WinScreen(Menu):
@@ -1569,6 +1492,7 @@ class WinScreen(Menu):
 
     title = "You Win!"
     options = ["Retry", "Save Seed", "Generate New World", "Quit"]
+    seed_tag = 'won'
     show_back_button = False
 
     def __init__(self, game):
@@ -1576,6 +1500,10 @@ class WinScreen(Menu):
         self.manager = None
         self.seed = game.seed
         self.elapsed_time = game.tick_count
+        self.record_time = not game.replay
+
+        if self.record_time:
+            seedstore.record_time(self.seed, self.elapsed_time)
 
         self.selections = [InGame(seed=self.seed),
                            "seed: {0}".format(self.seed),
@@ -1583,30 +1511,38 @@ class WinScreen(Menu):
                            TitleScreen()
         ]
 
+    def enter(self):
+        """
+        Start generating the new world in the background while the player is in the menu
+        """
+        self.selections[2].pregenerate_world()
+
+    def save_seed(self, seed):
+        """
+        Save the seed along with the time it was just won in, unless it was won in a replay
+        """
+        super().save_seed(seed)
+        if self.record_time:
+            seedstore.record_time(seed, self.elapsed_time)
+
     def extra_draw(self, screen):
         # Print the final time
-        partials = self.elapsed_time % 60
-        seconds = ((self.elapsed_time - partials) // 60) % 60
-        minutes = (((self.elapsed_time - partials) // 60) - seconds) // 60
-        if len(str(partials)) != 2:
-            partials = "0" + str(partials)
-        if len(str(seconds)) != 2:
-            seconds = "0" + str(seconds)
-        if len(str(minutes)) != 2:
-            minutes = "0" + str(minutes)
-        formatted_elapsed_time = "{minutes}:{seconds}:{partials}".format(minutes=minutes, seconds=seconds, partials=partials)
-        elapsed_time_display = h.load_font('luximb.ttf', 48).render(
-            "Final Time: {ElapsedTime}".format(ElapsedTime=formatted_elapsed_time), 1, c.GREEN
-        )
-        elapsed_time_display_rect = elapsed_time_display.get_rect()
+        formatted_elapsed_time = h.format_time(self.elapsed_time)
+        glyphs = h.load_glyphs('luximb.ttf', 48, c.GREEN)
+
+        label = h.render_text(h.load_font('luximb.ttf', 48), "Final Time: ", c.GREEN)
+        time_rect = h.get_glyph_rect(formatted_elapsed_time, glyphs)
+
+        elapsed_time_display_rect = pygame.Rect(0, 0, label.get_width() + time_rect.width,
+                                                max(label.get_height(), time_rect.height))
         elapsed_time_display_rect.center = (settings['WIDTH']/2, settings['HEIGHT']/2)
         elapsed_time_display_rect.y += .15*settings['HEIGHT']
-        screen.blit(elapsed_time_display, elapsed_time_display_rect)
+        screen.blit(label, elapsed_time_display_rect)
+        h.blit_glyphs(formatted_elapsed_time, glyphs, screen,
+                      (elapsed_time_display_rect.x + label.get_width(), elapsed_time_display_rect.y))
 
         # Print the seed
-        seed_text = h.load_font("luximb.ttf", 16).render(
-            "SEED: {0}".format(self.seed), 1, c.BLUE
-        )
+        seed_text = h.render_text(h.load_font("luximb.ttf", 16), "SEED: {0}".format(self.seed), c.BLUE)
         seed_rect = seed_text.get_rect()
         seed_rect.right = settings['WIDTH']
         seed_rect.bottom = settings['HEIGHT']
@@ -1631,9 +1567,7 @@ class PauseScreen(Menu):
         """
         Print the seed
         """
-        seed_text = h.load_font("luximb.ttf", 16).render(
-            "SEED: {0}".format(self.seed), 1, c.BLUE
-        )
+        seed_text = h.render_text(h.load_font("luximb.ttf", 16), "SEED: {0}".format(self.seed), c.BLUE)
         seed_rect = seed_text.get_rect()
         seed_rect.right = settings['WIDTH']
         seed_rect.bottom = settings['HEIGHT']
@@ -5,9 +5,12 @@ import os
 import time
 import math
 import random
+import atexit
 import logging
 import heapq
 import json
+import weakref
+from collections import OrderedDict
 import pygame
 from config import settings
 import constants as c
@@ -16,8 +19,17 @@ module_logger = logging.getLogger('mineEye.helpers')
 
 # Caches for sprites and fonts to mitigate the slow loading process
 _image_library = {}
+_frame_library = {}
+_atlas = None
+_background_library = {}
 _font_library = {}
+_glyph_library = {}
+_text_library = OrderedDict()
+_marker_library = {}
 _sound_library = {}
+_replay_recorders = weakref.WeakSet()
+
+MAX_TEXT_SURFACES = 256  # rendered strings kept in _text_library
 
 
 class Sprite(pygame.sprite.Sprite):
@@ -60,6 +72,46 @@ class Sprite(pygame.sprite.Sprite):
         self.rect.y += yspeed
 
 
+class Animation:
+    """
+    A looping animation driven by the game's tick count instead of the wall clock.
+
+    The frame to show is picked with integer arithmetic from the tick being drawn,
+    so an animation looks the same at any playback speed, and any number of sprites
+    can share one Animation.
+    """
+    def __init__(self, frames, ticks_per_frame=c.ANIMATION_FRAME_TICKS):
+        """
+        :param frames: A list of pygame surfaces to loop through
+        :param ticks_per_frame: The number of ticks each frame is shown for
+        """
+        self.frames = frames
+        self.ticks_per_frame = ticks_per_frame
+
+    def get_frame(self, tick):
+        """
+        Return the frame to show at a given tick
+        """
+        return self.frames[tick // self.ticks_per_frame % len(self.frames)]
+
+    def blit(self, screen, position, tick):
+        """
+        Blit the frame for a given tick to the screen
+
+        :param screen: The screen to blit to
+        :param position: The position or rect to blit to
+        :param tick: The game tick being drawn
+        """
+        screen.blit(self.get_frame(tick), position)
+
+    def flipped(self):
+        """
+        Return a new Animation with every frame mirrored horizontally
+        """
+        return Animation([pygame.transform.flip(frame, True, False) for frame in self.frames],
+                         self.ticks_per_frame)
+
+
 class Queue:
     """
     A queue class to store potential paths for pathfinding
@@ -86,6 +138,9 @@ class Graph:
     """
     A grid of nodes representing the world.
 
+    version goes up every time a node or wall is added or removed,
+    so that anything drawn from the graph knows when to redraw.
+
     Thanks to redblobgames.com for the basis of this code.
     """
 
@@ -93,15 +148,18 @@ class Graph:
         self.nodes = []
         self.walls = []
         self.weights = {}
+        self.version = 0
 
     def cost(self, a, b):
         return 1
 
     def append(self, node):
         self.nodes.append(node)
+        self.version += 1
 
     def add_wall(self, node):
         self.walls.append(self.nodes.index(node))
+        self.version += 1
 
     def passable(self, node):
         try:
@@ -111,6 +169,7 @@ class Graph:
 
     def make_passable(self, node):
         self.walls.remove(self.nodes.index(node))
+        self.version += 1
 
     def heuristic(self, a, b):
         """
@@ -157,6 +216,64 @@ class Graph:
         self.nodes = [(node[0], node[1] + y) for node in self.nodes]
 
 
+class ReplayRecorder:
+    """
+    Write the events of a run through a world to its replay file.
+
+    The file is opened once, and events are kept in its write buffer until it is flushed,
+    rather than opening and closing the file every tick. Any recorders still open when the
+    program exits are flushed and closed by close_replay_recorders, even after a crash.
+
+    Each line of the file takes the form "tick event info", for example "120 KeyDown Left".
+    """
+
+    def __init__(self, path, buffer_size=65536):
+        """
+        :param path: The path of the replay file, which is added to if it already exists
+        :param buffer_size: The Int number of bytes to keep before writing them to the file
+        """
+        self.path = path
+        self.file = open(path, 'a', buffering=buffer_size)
+        _replay_recorders.add(self)
+
+    def record(self, tick, event_name, info):
+        """
+        Add an event to the replay
+
+        :param tick: The Int tick the event happened on
+        :param event_name: The name of the event, such as KeyDown or Mouse1Up
+        :param info: The key or position of the event
+        """
+        self.file.write('{tick} {event} {info}\n'.format(tick=tick, event=event_name, info=info))
+
+    def flush(self):
+        """
+        Write everything recorded so far to the file
+        """
+        if not self.file.closed:
+            self.file.flush()
+
+    def close(self):
+        """
+        Write everything recorded so far and close the file
+        """
+        if not self.file.closed:
+            self.file.close()
+            module_logger.debug('closed replay {0}'.format(self.path))
+        _replay_recorders.discard(self)
+
+
+def close_replay_recorders():
+    """
+    Close every replay still being recorded, so that nothing recorded is lost when the program exits
+    """
+    for recorder in list(_replay_recorders):
+        recorder.close()
+
+
+atexit.register(close_replay_recorders)
+
+
 def load(imagename, subfolder=None):
     """
     Retrieves previously loaded images from _image_library, and stores newly created ones there as they are called.
@@ -171,32 +288,172 @@ def load(imagename, subfolder=None):
     image = _image_library.get((imagename, subfolder))
 
     if image is None:
-        if subfolder:
+        sprite = load_atlas().get(subfolder + '/' + imagename if subfolder else imagename)
+        if sprite:
+            image = sprite['keyed'].subsurface(sprite['rect'])
+        elif subfolder:
             image = pygame.image.load(os.path.join("Sprites", subfolder, imagename)).convert()
             image.set_colorkey(c.COLORKEY)
         else:
             image = pygame.image.load(os.path.join("Sprites", imagename)).convert()
             image.set_colorkey(c.COLORKEY)
+
+        if settings['DEBUG']:
+            check_display_format(image, imagename)
         _image_library[(imagename, subfolder)] = image
 
     return image
 
 
-def create_background(background_tile):
+def load_atlas():
+    """
+    Load the sprite sheets built by build_atlas.py, if they exist.
+
+    Every sheet is decoded once, and kept both with per pixel alpha and converted to the
+    display format with c.COLORKEY as the transparent color. Sprites are handed out as
+    subsurfaces of these sheets by load() and load_frame().
+
+    :returns atlas: a dictionary of sprite path (relative to Sprites, using /): a dictionary
+        with the 'alpha' sheet, the 'keyed' sheet, and the 'rect' of the sprite on them.
+        The dictionary is empty if the atlas hasn't been built.
+    """
+    global _atlas
+
+    if _atlas is None:
+        try:
+            with open(os.path.join('Sprites', 'atlas.json'), 'r') as infile:
+                index = json.load(infile)
+
+        except FileNotFoundError:
+            module_logger.info('No sprite atlas found - loading sprites individually')
+            _atlas = {}
+
+        else:
+            alpha_sheets = []
+            keyed_sheets = []
+            for sheet_name in index['sheets']:
+                sheet = pygame.image.load(os.path.join('Sprites', sheet_name)).convert_alpha()
+                keyed_sheet = sheet.convert()
+                keyed_sheet.set_colorkey(c.COLORKEY)
+                alpha_sheets.append(sheet)
+                keyed_sheets.append(keyed_sheet)
+
+            _atlas = {}
+            for name, (sheet, x, y, width, height) in index['sprites'].items():
+                _atlas[name] = {'alpha': alpha_sheets[sheet], 'keyed': keyed_sheets[sheet],
+                                'rect': pygame.Rect(x, y, width, height)}
+
+            module_logger.info('Loaded {0} sprites from the atlas'.format(len(_atlas)))
+
+    return _atlas
+
+
+def load_frame(imagename, subfolder):
     """
-    Creates a surface made by tiling the background_tile image. Not stored in cache to allow background changes
+    Retrieve a frame of animation with its per pixel alpha intact, for use in an Animation.
 
-    :param background_tile: a pygame surface that can be tiled
-    :returns background: a pygame surface consisting of the tiled background_tile
+    Frames come from the atlas if it has been built, otherwise from their own file.
+    Either way they are converted to the display's alpha format once, when first loaded.
+
+    :param imagename: a string representing the name of the image to load, including extension
+    :param subfolder: a string representing the subfolder of Sprites in which the image is stored
+    :returns frame: a pygame surface
     """
-    background = pygame.Surface(settings['SCREEN_RESOLUTION'])
-    for i in range(0, settings['WIDTH'], background_tile.get_width()):
-        for n in range(0, settings['HEIGHT'], background_tile.get_height()):
-            background.blit(background_tile, (i, n))
+    global _frame_library
+    frame = _frame_library.get((imagename, subfolder))
+
+    if frame is None:
+        sprite = load_atlas().get(subfolder + '/' + imagename)
+        if sprite:
+            frame = sprite['alpha'].subsurface(sprite['rect'])
+        else:
+            frame = pygame.image.load(os.path.join('Sprites', subfolder, imagename)).convert_alpha()
+
+        if settings['DEBUG']:
+            check_display_format(frame, os.path.join(subfolder, imagename))
+        _frame_library[(imagename, subfolder)] = frame
+
+    return frame
+
+
+def check_display_format(surface, name):
+    """
+    Log a warning if a surface is not in the display's pixel format.
+
+    Blitting a surface in any other format converts every pixel on every blit,
+    so every sprite should be converted once as it is loaded.
+    Only called in DEBUG mode.
+
+    :param surface: the pygame surface to check
+    :param name: a string naming the surface in the warning
+    :returns converted: True if the surface matches the display format (with or without alpha)
+    """
+    if surface.get_flags() & pygame.SRCALPHA:
+        display_format = pygame.Surface((1, 1)).convert_alpha()
+    else:
+        display_format = pygame.Surface((1, 1)).convert()
+
+    converted = (surface.get_bitsize() == display_format.get_bitsize() and
+                 surface.get_masks() == display_format.get_masks())
+
+    if not converted:
+        module_logger.warning('{0} is not in the display format and will be converted on every blit'.format(name))
+
+    return converted
+
+
+def load_background(imagename, size):
+    """
+    Retrieves a previously tiled background from _background_library, or tiles a new one and stores it there.
+
+    The background is made of whole tiles and is at least as large as size, so that it still
+    covers the screen when it is scrolled and wrapped around by blit_background.
+
+    :param imagename: a string representing the name of the tile image to load, including extension
+    :param size: an int tuple of the smallest size the background can be, usually the screen size
+    :returns background: a pygame surface consisting of the tiled image
+    """
+    global _background_library
+    background = _background_library.get((imagename, size))
+
+    if background is None:
+        background_tile = load(imagename)
+        tile_width, tile_height = background_tile.get_size()
+
+        width = -(-size[0] // tile_width) * tile_width
+        height = -(-size[1] // tile_height) * tile_height
+
+        background = pygame.Surface((width, height)).convert()
+        for i in range(0, width, tile_width):
+            for n in range(0, height, tile_height):
+                background.blit(background_tile, (i, n))
+        _background_library[(imagename, size)] = background
 
     return background
 
 
+def blit_background(screen, imagename, position=(0, 0)):
+    """
+    Cover the screen with a tiled background, scrolled to a certain position.
+
+    The background wraps around, so at most four blits are needed to cover the screen.
+
+    :param screen: the screen to blit to
+    :param imagename: a string representing the name of the tile image, including extension
+    :param position: an int tuple of where the top left corner of the background would be drawn
+    """
+    background = load_background(imagename, screen.get_size())
+    width, height = background.get_size()
+    screen_width, screen_height = screen.get_size()
+
+    x = int(position[0]) % width
+    y = int(position[1]) % height
+    for i in (x - width, x):
+        for n in (y - height, y):
+            if i + width > 0 and n + height > 0 and i < screen_width and n < screen_height:
+                screen.blit(background, (i, n))
+
+
 def load_font(fontname, size):
     """
     Loads a font if it doesn't already exist, retrieves it from a dictionary if it does.
@@ -214,6 +471,118 @@ def load_font(fontname, size):
     return font
 
 
+def render_text(font, text, color):
+    """
+    Retrieves previously rendered text from _text_library, and stores newly rendered text there.
+
+    Menus redraw the same strings every time they are drawn, so the rendered surfaces are kept
+    until the text itself changes. Only the MAX_TEXT_SURFACES most recently used strings are kept,
+    so text that is only shown once, such as a seed being typed, is eventually forgotten.
+    :param font: the pre-loaded pygame font to render with
+    :param text: the string to render
+    :param color: the color to render the text in
+    :returns surface: a pygame surface with the text rendered on it
+    """
+    global _text_library
+    key = (font, text, color)
+    surface = _text_library.get(key)
+
+    if surface is None:
+        surface = font.render(text, 1, color)
+        _text_library[key] = surface
+        if len(_text_library) > MAX_TEXT_SURFACES:
+            _text_library.popitem(last=False)
+    else:
+        _text_library.move_to_end(key)
+
+    return surface
+
+
+def render_marker(color, radius):
+    """
+    Retrieves a previously drawn dot from _marker_library, and stores newly drawn ones there.
+
+    Used by the SHOW_NODES debug overlay.
+    :param color: the color of the dot
+    :param radius: the radius of the dot in px
+    :returns surface: a pygame surface with the dot drawn on it
+    """
+    global _marker_library
+    surface = _marker_library.get((color, radius))
+
+    if surface is None:
+        surface = pygame.Surface((2*radius, 2*radius)).convert()
+        surface.fill(c.COLORKEY)
+        surface.set_colorkey(c.COLORKEY)
+        pygame.draw.circle(surface, color, (radius, radius), radius)
+        _marker_library[(color, radius)] = surface
+
+    return surface
+
+
+def load_glyphs(fontname, size, color, characters='0123456789:'):
+    """
+    Render every character of a font once, so that text made of them can be blitted without re-rendering.
+
+    :param fontname: a string representing the name of the font to load, including extension
+    :param size: an int representing the size of the font
+    :param color: the color to render the characters in
+    :param characters: a string of every character to render
+    :returns glyphs: a dictionary of character: pygame surface
+    """
+    global _glyph_library
+    glyphs = _glyph_library.get((fontname, size, color))
+
+    if glyphs is None:
+        font = load_font(fontname, size)
+        glyphs = {char: font.render(char, 1, color) for char in characters}
+        _glyph_library[(fontname, size, color)] = glyphs
+
+    return glyphs
+
+
+def get_glyph_rect(text, glyphs):
+    """
+    Get the rect covered by a string of pre-rendered characters
+
+    :param text: the string to measure
+    :param glyphs: a dictionary of pre-rendered characters, from load_glyphs
+    :returns rect: a pygame rect at (0, 0) with the size of the text
+    """
+    return pygame.Rect(0, 0, sum(glyphs[char].get_width() for char in text),
+                       max(glyphs[char].get_height() for char in text))
+
+
+def blit_glyphs(text, glyphs, screen, position):
+    """
+    Blit a string made of pre-rendered characters to a certain position on the screen.
+
+    :param text: the string to blit
+    :param glyphs: a dictionary of pre-rendered characters, from load_glyphs
+    :param screen: the screen to blit to
+    :param position: the top left corner to start blitting from
+    """
+    x, y = position
+    for char in text:
+        glyph = glyphs[char]
+        screen.blit(glyph, (x, y))
+        x += glyph.get_width()
+
+
+def format_time(tick_count):
+    """
+    Format a number of game ticks as minutes:seconds:partials for the speedrun timer
+
+    :param tick_count: the number of ticks elapsed
+    :returns formatted_time: the formatted string
+    """
+    partials = tick_count % 60
+    seconds = (tick_count // 60) % 60
+    minutes = tick_count // 3600
+
+    return "{0:02d}:{1:02d}:{2:02d}".format(minutes, seconds, partials)
+
+
 def play_music(musicname):
     """
     Load a pygame music object from a music file and play it.
@@ -299,17 +668,17 @@ def create_menu(screen, title, options, descriptions=None,
     else:
         description_font = load_font('Melma.ttf', 24)
 
-    title_surf = title_font.render(title, 1, title_color)
+    title_surf = render_text(title_font, title, title_color)
     blit_text(title_surf, screen, 0)
 
     i = 1
     rect_list = []
     if descriptions is not None:
         for option in options:
-            option_surf = option_font.render(option, 1, option_color)
+            option_surf = render_text(option_font, option, option_color)
             rect = blit_text(option_surf, screen, i)
 
-            description_surf = description_font.render(descriptions[i - 1], 1, description_color)
+            description_surf = render_text(description_font, descriptions[i - 1], description_color)
             desc_rect = description_surf.get_rect()
             desc_rect.top = rect.bottom
             desc_rect.centerx = rect.centerx
@@ -319,7 +688,7 @@ def create_menu(screen, title, options, descriptions=None,
             i += 1
     else:
         for option in options:
-            option_surf = option_font.render(option, 1, option_color)
+            option_surf = render_text(option_font, option, option_color)
             rect = blit_text(option_surf, screen, i)
             rect_list.append(rect)
             i += 1
@@ -364,24 +733,6 @@ def generate_seed():
     return random.randint(0, 100000000000)
 
 
-def load_seed_file():
-    """
-    Load the seed file into a dictionary
-    """
-    try:
-        module_logger.debug('Try to load seeds')
-        with open('seeds.txt', 'r') as infile:
-            seeds = json.loads(infile.read())
-
-    except FileNotFoundError:
-        module_logger.debug('Failed - creating seeds instead')
-        seeds = [''] * 11
-        with open('seeds.txt', 'w') as outfile:
-            json.dump(seeds, outfile)
-
-    return seeds
-
-
 def get_node_dist(node1, node2):
     """
     Return the absolute distance between two nodes
@@ -1,10 +1,8 @@
 """
 Exports the Hero that the User can control
 """
-import os
 import logging
 import pygame
-from dependencies import pyganim
 import entities
 import helpers as h
 from config import settings
@@ -82,9 +80,8 @@ class Hero(pygame.sprite.Sprite):
         self.moving_right = False
         self.last_motion = 'right'
 
-        # Sprite and PygAnim stuff
+        # Sprite and animation stuff
         self.animation_obj = {}
-        self.conductor = None
         self.rect = pygame.Rect(0, 0, 48, 48)
         self.rect.center = (settings['WIDTH']/2, settings['HEIGHT']/2)
 
@@ -95,49 +92,33 @@ class Hero(pygame.sprite.Sprite):
 
     def create_animation_dict(self):
         """
-        Create an animation object and conductor to run the animations for walking, jumping, standing, etc.
+        Create an animation object for walking, jumping, standing, etc.
 
         note: only right moving sprites exist. left sprites are simply reflections of the right sprites.
 
         Pulls all the images of a category in the Sprites/[hero name] folder
-        Creates a Pyganim animation for each possible motion, then stores them in a dictionary
-        Creates a Pyganim conductor to control the dictionary of animations
+        Creates an Animation for each possible motion, then stores them in a dictionary
 
         Thanks to the pyganim example code for the basis of this code.
         """
-        standing = [(os.path.join('Sprites', self.name, 'standing{num}.png'.format(num=num)), 0.1)
-                    for num in range(3)]
+        standing = [h.load_frame('standing{num}.png'.format(num=num), self.name) for num in range(3)]
+        walking = [h.load_frame('walking{num}.png'.format(num=num), self.name) for num in range(8)]
+        jumping = [h.load_frame('jumping{num}.png'.format(num=num), self.name) for num in range(4)]
 
-        walking = [(os.path.join('Sprites', self.name, 'walking{num}.png'.format(num=num)), 0.1)
-                   for num in range(8)]
+        self.animation_obj['stand_right'] = h.Animation(standing)
+        self.animation_obj['stand_left'] = self.animation_obj['stand_right'].flipped()
 
-        jumping = [(os.path.join('Sprites', self.name, 'jumping{num}.png'.format(num=num)), 0.1)
-                   for num in range(4)]
+        self.animation_obj['move_right'] = h.Animation(walking)
+        self.animation_obj['move_left'] = self.animation_obj['move_right'].flipped()
 
-        self.animation_obj['stand_right'] = pyganim.PygAnimation(standing)
+        self.animation_obj['jump_right'] = h.Animation(jumping)
+        self.animation_obj['jump_left'] = self.animation_obj['jump_right'].flipped()
 
-        self.animation_obj['stand_left'] = self.animation_obj['stand_right'].getCopy()
-        self.animation_obj['stand_left'].flip(True, False)
-        self.animation_obj['stand_left'].makeTransformsPermanent()
-
-        self.animation_obj['move_right'] = pyganim.PygAnimation(walking)
-
-        self.animation_obj['move_left'] = self.animation_obj['move_right'].getCopy()
-        self.animation_obj['move_left'].flip(True, False)
-        self.animation_obj['move_left'].makeTransformsPermanent()
-
-        self.animation_obj['jump_right'] = pyganim.PygAnimation(jumping)
-
-        self.animation_obj['jump_left'] = self.animation_obj['jump_right'].getCopy()
-        self.animation_obj['jump_left'].flip(True, False)
-        self.animation_obj['jump_left'].makeTransformsPermanent()
-
-        self.conductor = pyganim.PygConductor(self.animation_obj)
-
-    def draw(self, screen):
+    def draw(self, screen, tick):
         """
         Draw the animated Hero to the screen in a certain way based on user input
         :param screen: The screen on which to draw
+        :param tick: The game tick being drawn, which picks the frame of animation
         """
         if self.jump_count >= 4:
             self.jump_count = 0
@@ -146,28 +127,25 @@ class Hero(pygame.sprite.Sprite):
 
         if self.start_jump or self.start_double_jump:
             self.jump_count += 1
-            self.conductor.play()
             if self.last_motion == 'right':
-                self.animation_obj['jump_right'].blit(screen, self.rect)
+                self.animation_obj['jump_right'].blit(screen, self.rect, tick)
 
             elif self.last_motion == 'left':
-                self.animation_obj['jump_left'].blit(screen, self.rect)
+                self.animation_obj['jump_left'].blit(screen, self.rect, tick)
 
         elif self.moving_left or self.moving_right:
-            self.conductor.play()
             if self.moving_left:
-                self.animation_obj['move_left'].blit(screen, self.rect)
+                self.animation_obj['move_left'].blit(screen, self.rect, tick)
 
             elif self.moving_right:
-                self.animation_obj['move_right'].blit(screen, self.rect)
+                self.animation_obj['move_right'].blit(screen, self.rect, tick)
 
         else:
-            self.conductor.play()
             if self.last_motion == 'right':
-                self.animation_obj['stand_right'].blit(screen, self.rect)
+                self.animation_obj['stand_right'].blit(screen, self.rect, tick)
 
             elif self.last_motion == 'left':
-                self.animation_obj['stand_left'].blit(screen, self.rect)
+                self.animation_obj['stand_left'].blit(screen, self.rect, tick)
 
     def update(self):
         if self.speed_boost_counter > 0:
@@ -0,0 +1,250 @@
+"""
+Optional ways of getting the game onto the screen.
+
+By default, every game state blits its surfaces onto the display surface in software.
+
+If settings['RENDERER'] is 'texture', run.py draws through a TextureScreen instead.
+A TextureScreen looks like the display surface to the game states, but uploads each
+surface to an SDL2 texture the first time it is blitted and draws it with the SDL2
+renderer from then on. Sprites from the atlas share the texture of their sheet.
+
+This needs pygame 2 (pygame._sdl2.video). Without it, run.py falls back to blitting.
+
+Running this file compares the two:
+    python renderer.py
+plays a few hundred frames of the same seed through both, headless, with SDL's
+software renderer, and prints the draw calls and time taken per frame.
+"""
+import os
+import time
+import weakref
+import logging
+import pygame
+
+try:
+    from pygame._sdl2 import video
+except ImportError:  # pygame 1
+    video = None
+
+module_logger = logging.getLogger('mineEye.renderer')
+
+
+class TextureScreen:
+    """
+    A stand-in for the display surface that draws with an SDL2 Renderer.
+
+    Everything is drawn onto a target texture rather than straight to the window,
+    so what has been drawn persists between frames just like the display surface does,
+    and menus can still redraw only what changed.
+
+    Surfaces are assumed not to change after they are first blitted - the game always
+    renders a new surface when something changes (text, HUD pieces, terrain chunks).
+    Their textures are dropped when the surfaces are garbage collected.
+
+    draw_calls counts every texture drawn, to compare against DrawCounter.
+    """
+
+    def __init__(self, size, accelerated=-1, hidden=False, window_size=None):
+        """
+        Open a window and create a renderer for it
+
+        :param size: Int tuple representing the size everything is drawn at
+        :param accelerated: 1 for a hardware renderer, 0 for the software renderer,
+            -1 for hardware if available
+        :param hidden: Boolean. True to keep the window hidden, such as for testing.
+        :param window_size: Int tuple representing the size of the window, which the drawing
+            is stretched to fill. None for the same as size.
+        """
+        self.size = tuple(size)
+
+        self.window = video.Window('mineEye', tuple(window_size or size), hidden=hidden)
+        self.renderer = video.Renderer(self.window, accelerated=accelerated, target_texture=True)
+        self.renderer.logical_size = self.size
+
+        self.target = video.Texture(self.renderer, self.size, target=True)
+        self.renderer.target = self.target
+
+        self.textures = weakref.WeakKeyDictionary()
+        self.draw_calls = 0
+
+    def get_size(self):
+        return self.size
+
+    def get_width(self):
+        return self.size[0]
+
+    def get_height(self):
+        return self.size[1]
+
+    def get_rect(self, **kwargs):
+        """
+        Return the rect of the screen, with any attributes given as keyword arguments set on it
+        """
+        rect = pygame.Rect((0, 0), self.size)
+        for attribute, value in kwargs.items():
+            setattr(rect, attribute, value)
+
+        return rect
+
+    def get_texture(self, surface):
+        """
+        Return the texture a surface is drawn from, uploading it the first time.
+
+        Subsurfaces are drawn from the texture of the surface they are part of.
+
+        :param surface: A pygame surface, or a texture from TextureScreen.copy()
+        :returns texture, offset: The texture, and the position of the surface on it
+        """
+        if isinstance(surface, video.Texture):
+            return surface, (0, 0)
+
+        offset = (0, 0)
+        if surface.get_parent() is not None:
+            offset = surface.get_abs_offset()
+            surface = surface.get_abs_parent()
+
+        texture = self.textures.get(surface)
+        if texture is None:
+            texture = video.Texture.from_surface(self.renderer, surface)
+            self.textures[surface] = texture
+
+        return texture, offset
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        """
+        Draw a surface onto the screen, like pygame.Surface.blit
+
+        special_flags are not supported, and are ignored.
+        Like pygame.Surface.blit, nothing is drawn if the source or area is empty,
+        such as text rendered from an empty string.
+        :returns rect: The area of the screen drawn to
+        """
+        size = source.get_size() if not isinstance(source, video.Texture) else (source.width, source.height)
+        if area is None:
+            area = pygame.Rect((0, 0), size)
+        else:
+            area = pygame.Rect(area).clip(pygame.Rect((0, 0), size))
+
+        rect = pygame.Rect(dest[0], dest[1], area.width, area.height)
+        if area.width == 0 or area.height == 0:
+            return rect
+
+        texture, offset = self.get_texture(source)
+        texture.draw(area.move(offset), rect)
+        self.draw_calls += 1
+
+        return rect
+
+    def blits(self, blit_sequence, doreturn=True):
+        """
+        Draw a sequence of surfaces onto the screen, like pygame.Surface.blits
+        """
+        rects = [self.blit(*blit_args) for blit_args in blit_sequence]
+        if doreturn:
+            return rects
+
+    def copy(self):
+        """
+        Return a texture holding a copy of everything drawn so far.
+
+        It can be blitted back onto the screen later.
+        """
+        snapshot = video.Texture(self.renderer, self.size, target=True)
+        self.renderer.target = snapshot
+        self.target.draw()
+        self.renderer.target = self.target
+
+        return snapshot
+
+    def present(self):
+        """
+        Show everything drawn so far in the window. Replaces pygame.display.flip()
+        """
+        self.renderer.target = None
+        self.target.draw()
+        self.renderer.present()
+        self.renderer.target = self.target
+
+
+class DrawCounter:
+    """
+    Wrap a pygame surface and count the blits made onto it.
+
+    Used to compare the normal blitting path against TextureScreen.draw_calls.
+    Everything other than blit and blits is passed straight to the surface.
+    """
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.draw_calls = 0
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        self.draw_calls += 1
+        return self.surface.blit(source, dest, area, special_flags)
+
+    def blits(self, blit_sequence, doreturn=True):
+        blit_sequence = list(blit_sequence)
+        self.draw_calls += len(blit_sequence)
+        return self.surface.blits(blit_sequence, doreturn)
+
+    def __getattr__(self, name):
+        return getattr(self.surface, name)
+
+
+def get_upscaled_size(size):
+    """
+    Return the largest whole multiple of a size that fits the desktop,
+    the same window size pygame.SCALED picks for the display surface.
+
+    :param size: Int tuple representing the size everything is drawn at
+    :returns window_size: Int tuple representing the size of the window
+    """
+    desktop_width, desktop_height = pygame.display.get_desktop_sizes()[0]
+    scale = max(1, min(desktop_width // size[0], desktop_height // size[1]))
+
+    return size[0] * scale, size[1] * scale
+
+
+def compare_backends(seed=1, frames=300):
+    """
+    Play the same seed through the blitting path and the texture path, and print how they compare.
+
+    The hero runs right for the whole time, so that the world scrolls.
+
+    :param seed: The seed of the world to play
+    :param frames: The number of frames to draw with each backend
+    """
+    from config import settings
+    import gamestates
+
+    settings['PLAY_MUSIC'] = False
+    pygame.display.set_mode(settings['SCREEN_RESOLUTION'])
+
+    backends = [('blit', lambda: DrawCounter(pygame.display.get_surface()), pygame.display.flip)]
+    if video is not None:
+        texture_screen = TextureScreen(settings['SCREEN_RESOLUTION'], accelerated=0, hidden=True)
+        backends.append(('texture', lambda: texture_screen, texture_screen.present))
+
+    for name, get_screen, present in backends:
+        screen = get_screen()
+        manager = gamestates.GameStateManager()
+        manager.go_to(gamestates.InGame(seed=seed))
+        manager.state.move_right()
+
+        start_time = time.time()
+        for _ in range(frames):
+            manager.state.handle_events([])
+            manager.state.update()
+            manager.state.draw(screen)
+            present()
+        elapsed_time = time.time() - start_time
+
+        print('{name}: {calls:.1f} draw calls per frame, {ms:.2f} ms per frame'.format(
+            name=name, calls=screen.draw_calls / frames, ms=1000 * elapsed_time / frames))
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    pygame.init()
+    compare_backends()
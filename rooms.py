@@ -10,6 +10,11 @@ PrimaryPlayerMotion is a variable that tells the game what direction
 the player is moving in through the room.
 
 StartingRoom and EndingRoom must exist somewhere
+
+Every room is compiled into a RoomTemplate when this module is imported,
+stored in templates under the same name. World generation and parsing only
+use the templates, so the strings are never scanned again.
+
    KEY for room_array:
        S is stone
        P is spike
@@ -22,6 +27,13 @@ StartingRoom and EndingRoom must exist somewhere
 
 import constants as c
 
+_transition_table = None
+
+# What to create for each character of a room
+WALL_TILES = {"S": {}, "R": {"end_timer": True}, "P": {"damage": 1}, "B": {"breakable": True}}
+ENEMY_TILES = {"V": "Volcano", "G": "Ghost", "F": "FireBat"}
+WEAPON_TILE = "W"
+
 room_dict = {
     "StartingRoom":
         [c.MOVE_RIGHT,
@@ -164,4 +176,109 @@ room_dict = {
         "SP   PP    S",
         "SSSSSSSSDDSS"
         ]
-}
\ No newline at end of file
+}
+
+
+
+class RoomTemplate:
+    """
+    A room from room_dict, compiled into lists of what to create where.
+
+    Positions are (column, row) tuples in tiles from the top left of the room.
+        direction is the PrimaryPlayerMotion of the room
+        rows are the strings making up the room, without the direction
+        entrance and exit are the columns of the doors in the top and bottom rows
+        nodes are the positions of every tile, in order from left to right, top to bottom
+        walls and enemies are (position, tile character) tuples
+        weapons are the positions of weapon chests
+        graph_walls are the numbers of the nodes that enemies can't path through (walls, but not spikes)
+    """
+
+    def __init__(self, name, room):
+        """
+        :param name: The name of the room in room_dict
+        :param room: The room from room_dict, as [PrimaryPlayerMotion, *room_layout]
+        """
+        self.name = name
+        self.direction = room[0]
+        self.rows = room[1:]
+
+        self.width = max(len(row) for row in self.rows)
+        self.height = len(self.rows)
+
+        self.entrance = self.rows[0].find('DD')
+        self.exit = self.rows[-1].find('DD')
+
+        self.nodes = []
+        self.walls = []
+        self.enemies = []
+        self.weapons = []
+        self.graph_walls = []
+
+        for y, row in enumerate(self.rows):
+            for x, char in enumerate(row):
+                self.nodes.append((x, y))
+
+                if char in WALL_TILES:
+                    self.walls.append(((x, y), char))
+                    if 'damage' not in WALL_TILES[char]:
+                        self.graph_walls.append(len(self.nodes) - 1)
+                elif char in ENEMY_TILES:
+                    self.enemies.append(((x, y), char))
+                elif char == WEAPON_TILE:
+                    self.weapons.append((x, y))
+
+    def __repr__(self):
+        return 'RoomTemplate({0})'.format(self.name)
+
+
+templates = {name: RoomTemplate(name, room) for name, room in room_dict.items()}
+
+
+def get_transition_table():
+    """
+    Return the rooms allowed to come next for every state of world generation, building the table the first time.
+
+    The state is the name of the previous room and how many rooms in a row have moved in its direction.
+    A room is allowed next if it wouldn't make too many rooms in a row move the same direction
+    (see constants.MAX_ROOMS_IN_A_ROW), and it is weighted less if it is the previous room repeated
+    (see constants.REPEAT_ROOM_ODDS). These are the same odds the version 1 generator gets by
+    picking rooms until one is allowed.
+
+    StartingRoom, EndingRoom and TransitionRoom are never picked.
+
+    :returns table: A dictionary of (previous room name, rooms in a row): (names, cumulative weights),
+        with the names and weights ready to pass to random.choices
+    """
+    global _transition_table
+
+    if _transition_table is None:
+        names = sorted(name for name in templates if name not in ["StartingRoom", "EndingRoom", "TransitionRoom"])
+        repeat_weight, weight = c.REPEAT_ROOM_ODDS
+
+        table = {}
+        states = [("StartingRoom", 0)]
+        states += [(previous_name, in_a_row) for previous_name in names
+                   for in_a_row in range(1, c.MAX_ROOMS_IN_A_ROW[templates[previous_name].direction] + 1)]
+
+        for previous_name, in_a_row in states:
+            previous_direction = templates[previous_name].direction
+            allowed_names = []
+            cumulative_weights = []
+            total = 0
+
+            for name in names:
+                direction = templates[name].direction
+                if direction == previous_direction and in_a_row >= c.MAX_ROOMS_IN_A_ROW[direction]:
+                    continue
+
+                total += repeat_weight if name == previous_name else weight
+                allowed_names.append(name)
+                cumulative_weights.append(total)
+
+            table[(previous_name, in_a_row)] = (allowed_names, cumulative_weights)
+
+        # Only publish the table once it is complete, as pregeneration threads may be reading it
+        _transition_table = table
+
+    return _transition_table
@@ -41,18 +41,25 @@ General outline:
 run.py - set up logger, run game loop.
 config.py - set up default config file. (overridden by user settings file)
 constants.py - if you want to mess with things easily, here's where to start.
+renderer.py - optionally draw with the SDL2 renderer instead of blitting.
 hero.py - The hero class and subclasses.
 enemy.py - The enemy class and subclasses.
 entities.py/drops.py - Bullets, Weapons, Items, the whole lot.
+build_atlas.py - optionally pack every sprite onto a few sheets that load faster.
+analyse_seeds.py - measure the worlds for a range of seeds without playing them, to hunt for good seeds.
 helpers.py - The start of where the magic happens. Load images, redefine sprites, make menus, etc.
 gamestates.py - The brunt of what you see that you don't realize you see.
 rooms.py - Rooms, walls, enemy calls, movement, updates, etc. If it happens during the actual GAME,
     it probably happens here.
+worldgen.py - Choose the rooms for a seed and work out where everything goes, in the background if possible.
+seedstore.py - The player's saved seeds, with their best times, tags and world metrics, in seeds.db.
 
 room_options.txt - the definition of all the available rooms' shapes.
                     parsed via JSON
 replays/*.txt - a txt file storing the Tick, the Event, and the Event Info to allow
                     functioning replays
+worldcache/*.world - worlds that have been built before, stored by worldcache.py
+                    so that replaying a seed skips generating it
 
 
 Don't post this or modifications anywhere without emailing me first, please. (pssst. if you email me, i'll say yes <3 )
@@ -100,8 +107,31 @@ pygame.init()
 
 from config import settings
 import gamestates
-
-screen = pygame.display.set_mode(settings['SCREEN_RESOLUTION'])
+import renderer
+
+if settings['RENDERER'] == 'texture' and renderer.video is None:
+    logger.warning('The texture renderer needs pygame 2 - falling back to software rendering')
+    settings['RENDERER'] = 'software'
+
+if settings['UPSCALE'] and settings['WINDOW_RESOLUTION'] is not None and renderer.video is None:
+    logger.warning('WINDOW_RESOLUTION needs pygame 2 - using the largest window that fits instead')
+
+if settings['RENDERER'] == 'texture':
+    # The hidden display only gives sprites a pixel format to be converted to as they load
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    if settings['UPSCALE']:
+        screen = renderer.TextureScreen(settings['SCREEN_RESOLUTION'],
+                                        window_size=(settings['WINDOW_RESOLUTION'] or
+                                                     renderer.get_upscaled_size(settings['SCREEN_RESOLUTION'])))
+    else:
+        screen = renderer.TextureScreen(settings['SCREEN_RESOLUTION'])
+elif settings['UPSCALE']:
+    # Everything is drawn at SCREEN_RESOLUTION, then SDL stretches it to fill the window
+    screen = pygame.display.set_mode(settings['SCREEN_RESOLUTION'], pygame.SCALED)
+    if settings['WINDOW_RESOLUTION'] is not None and renderer.video is not None:
+        renderer.video.Window.from_display_module().size = settings['WINDOW_RESOLUTION']
+else:
+    screen = pygame.display.set_mode(settings['SCREEN_RESOLUTION'])
 pygame.display.set_caption("mineEye")
 clock = pygame.time.Clock()
 pygame.mouse.set_visible(False)
@@ -122,6 +152,12 @@ while not manager.done:
         manager.state.handle_events(manager.state.event_list)
 
     manager.state.update()
-    manager.state.draw(screen)
+    dirty_rects = manager.state.draw(screen)
 
-    pygame.display.flip()
\ No newline at end of file
+    # States that report what changed only need those regions updated
+    if settings['RENDERER'] == 'texture':
+        screen.present()
+    elif dirty_rects is None:
+        pygame.display.flip()
+    else:
+        pygame.display.update(dirty_rects)
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+Keep the player's saved seeds in a SQLite database, seeds.db.
+
+Every seed is stored with:
+    added - when it was saved, so the newest can be listed first
+    best_time - the fewest ticks it has been won in, or NULL if it hasn't been won since it was saved
+    generator_version - the settings['GENERATOR_VERSION'] the metrics were measured with
+    the metrics of its world, measured by analyse_seeds.analyse_seed when it is saved
+and any number of tags, such as 'won' or 'died' for seeds saved from those screens.
+
+Menus only ask for one page of seeds at a time with get_page, and the columns pages are sorted
+by are indexed, so listing a page stays fast however many seeds are saved.
+
+The seeds in the old seeds.txt are copied in the first time the database is created.
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+from config import settings
+import analyse_seeds
+
+module_logger = logging.getLogger('mineEye.seedstore')
+
+DATABASE = 'seeds.db'
+SEED_FILE = 'seeds.txt'
+
+MAX_SEED = 2 ** 63 - 1  # The largest integer SQLite can store
+
+METRIC_COLUMNS = analyse_seeds.COLUMNS[1:]
+
+# name: (condition on the seeds listed, order they are listed in)
+ORDERS = {'newest': ('1', 'added DESC, seed'),
+          'fastest': ('best_time IS NOT NULL', 'best_time, seed'),
+          'shortest path': ('path_length IS NOT NULL', 'path_length, seed'),
+          'most weapons': ('1', 'weapons DESC, seed')}
+
+_connection = None
+
+
+def get_connection():
+    """
+    Return the connection to the database, opening it and creating the tables the first time.
+
+    :returns connection: A sqlite3.Connection
+    """
+    global _connection
+
+    if _connection is None:
+        created = not os.path.exists(DATABASE)
+
+        _connection = sqlite3.connect(DATABASE)
+        _connection.row_factory = sqlite3.Row
+        with _connection:
+            _connection.execute('CREATE TABLE IF NOT EXISTS seeds (seed INTEGER PRIMARY KEY, added REAL NOT NULL, '
+                                'best_time INTEGER, generator_version INTEGER, {0})'.format(
+                                    ', '.join('{0} INTEGER'.format(column) for column in METRIC_COLUMNS)))
+            _connection.execute('CREATE TABLE IF NOT EXISTS tags (tag TEXT NOT NULL, seed INTEGER NOT NULL, '
+                                'PRIMARY KEY (tag, seed)) WITHOUT ROWID')
+            _connection.execute('CREATE INDEX IF NOT EXISTS seeds_added ON seeds (added)')
+            _connection.execute('CREATE INDEX IF NOT EXISTS seeds_best_time ON seeds (best_time)')
+            _connection.execute('CREATE INDEX IF NOT EXISTS seeds_path_length ON seeds (path_length)')
+            _connection.execute('CREATE INDEX IF NOT EXISTS seeds_weapons ON seeds (weapons)')
+            _connection.execute('CREATE INDEX IF NOT EXISTS tags_seed ON tags (seed)')
+
+        if created:
+            module_logger.info('Created new seed database')
+            import_seed_file()
+
+    return _connection
+
+
+def import_seed_file():
+    """
+    Copy the seeds saved in seeds.txt, from before seeds were stored in the database
+    """
+    try:
+        with open(SEED_FILE, 'r') as infile:
+            old_seeds = json.loads(infile.read())
+
+    except (FileNotFoundError, ValueError):
+        return
+
+    old_seeds = [int(seed) for seed in old_seeds if str(seed).isdigit() and int(seed) <= MAX_SEED]
+    add_seeds([analyse_seeds.analyse_seed(seed, analyse_seeds.ROOM_COUNT, settings['GENERATOR_VERSION'])
+               for seed in old_seeds])
+    module_logger.info('Copied {0} seeds from {1}'.format(len(old_seeds), SEED_FILE))
+
+
+def add_seeds(rows, tag=None, version=None):
+    """
+    Save seeds that have already been measured, leaving any that are already saved as they are.
+
+    :param rows: A list of rows from analyse_seeds.analyse_seed, each a dictionary of column name: value
+    :param tag: A tag to give every seed, or None
+    :param version: The generator version the rows were measured with, or None for settings['GENERATOR_VERSION']
+    """
+    if version is None:
+        version = settings['GENERATOR_VERSION']
+
+    connection = get_connection()
+    added = time.time()
+    with connection:
+        connection.executemany('INSERT OR IGNORE INTO seeds (seed, added, generator_version, {0}) '
+                               'VALUES (?, ?, ?, {1})'.format(', '.join(METRIC_COLUMNS),
+                                                              ', '.join('?' * len(METRIC_COLUMNS))),
+                               [[row['seed'], added, version] + [row[column] for column in METRIC_COLUMNS]
+                                for row in rows])
+        if tag is not None:
+            connection.executemany('INSERT OR IGNORE INTO tags (tag, seed) VALUES (?, ?)',
+                                   [(tag, row['seed']) for row in rows])
+
+
+def add_seed(seed, tag=None):
+    """
+    Measure a seed's world and save it
+
+    :param seed: The Int seed to save
+    :param tag: A tag to give the seed, or None
+    """
+    if not 0 <= seed <= MAX_SEED:
+        module_logger.warning('seed {0} is too large to save'.format(seed))
+        return
+
+    version = settings['GENERATOR_VERSION']
+    add_seeds([analyse_seeds.analyse_seed(seed, analyse_seeds.ROOM_COUNT, version)], tag, version)
+    module_logger.info('saved seed {0}'.format(seed))
+
+
+def remove_seed(seed):
+    """
+    Forget a saved seed, along with its tags and best time
+    """
+    connection = get_connection()
+    with connection:
+        connection.execute('DELETE FROM seeds WHERE seed = ?', (seed,))
+        connection.execute('DELETE FROM tags WHERE seed = ?', (seed,))
+    module_logger.info('removed seed {0}'.format(seed))
+
+
+def record_time(seed, tick_count):
+    """
+    Store the time a seed was won in, if it is saved and the time is its best
+
+    :param seed: The Int seed that was won
+    :param tick_count: The number of ticks it was won in
+    """
+    if not 0 <= seed <= MAX_SEED:
+        return
+
+    connection = get_connection()
+    with connection:
+        connection.execute('UPDATE seeds SET best_time = ? WHERE seed = ? AND (best_time IS NULL OR best_time > ?)',
+                           (tick_count, seed, tick_count))
+
+
+def get_tags():
+    """
+    :returns tags: A sorted list of every tag given to a saved seed
+    """
+    return [row['tag'] for row in get_connection().execute('SELECT DISTINCT tag FROM tags ORDER BY tag')]
+
+
+def get_page(page, page_size, order='newest', tag=None):
+    """
+    Return one page of saved seeds.
+
+    One more row than page_size is asked for, so a menu knows whether there is another page.
+
+    :param page: The Int number of the page, starting from 0
+    :param page_size: The Int number of seeds on a page
+    :param order: The name of how to sort the seeds, from ORDERS
+    :param tag: Only list seeds with this tag, or None for every seed
+    :returns rows: A list of up to page_size + 1 sqlite3.Rows, with every column of the seeds table
+    """
+    condition, order_by = ORDERS[order]
+    parameters = [page_size + 1, page * page_size]
+
+    tag_join = ''
+    if tag is not None:
+        tag_join = 'JOIN tags USING (seed) '
+        condition += ' AND tag = ?'
+        parameters.insert(0, tag)
+
+    return get_connection().execute('SELECT seeds.* FROM seeds {join}WHERE {condition} ORDER BY {order_by} '
+                                     'LIMIT ? OFFSET ?'.format(join=tag_join, condition=condition,
+                                                               order_by=order_by),
+                                     parameters).fetchall()
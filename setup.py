@@ -3,6 +3,10 @@ A set up file for telling cx_Freeze how to compile the game properly.
 """
 import sys
 import cx_Freeze
+import build_atlas
+
+# Pack the sprites so that the frozen game loads a few sheets instead of every file
+build_atlas.build_atlas()
 
 base = None
 if sys.platform == "win32":
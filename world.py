@@ -3,14 +3,16 @@ Stores the World and everything that takes place within it
 
 World is created by putting rooms next to each other.
 The semirandom selection for this generation takes place in
-gamestates.InGame.generate_world()
+worldgen.py, and World.restore fills the world in from the result.
 """
-import random
+import bisect
 import logging
 import pygame
 from config import settings
+import constants as c
 import enemy
 import drops
+import rooms
 import helpers as h
 
 module_logger = logging.getLogger('mineEye.world')
@@ -37,6 +39,8 @@ class Wall(h.Sprite):
         self.breakable = breakable
         self.damage = damage
 
+        self.chunk = None
+
         if breakable:
             self.image = h.load('broken_stone.png')
         elif damage:
@@ -48,6 +52,110 @@ class Wall(h.Sprite):
         self.rect.center = center
 
 
+class TerrainChunk:
+    """
+    A square block of static tiles pre-rendered onto a single surface.
+
+    Walls never move relative to one another, so instead of blitting every
+    Wall sprite each frame the chunk is drawn once and blitted as a whole.
+    The chunk only needs to be re-rendered when one of its walls is destroyed.
+
+    origin is the world position of the chunk's top left corner, that is the
+    screen position it would have if the world had never been shifted.
+
+    bounds is the smallest rect, relative to origin, that holds every tile of the chunk.
+    The image only covers bounds, so chunks at the edges of rooms stay small.
+    """
+
+    def __init__(self, origin):
+        """
+        Create an empty chunk
+
+        :param origin: Int tuple representing the world position of the top left corner
+        """
+        self.origin = origin
+
+        self.tiles = []
+        self.bounds = None
+        self.image = None
+        self.dirty = True
+
+    def add(self, wall, position):
+        """
+        Add a wall to the chunk
+
+        :param wall: The Wall to draw as part of the chunk
+        :param position: Int tuple representing the world position of the wall's top left corner
+        """
+        wall.chunk = self
+        position = (position[0] - self.origin[0], position[1] - self.origin[1])
+        self.tiles.append((wall, position))
+
+        tile_rect = pygame.Rect(position, wall.rect.size)
+        self.bounds = tile_rect if self.bounds is None else self.bounds.union(tile_rect)
+        self.dirty = True
+
+    def render(self):
+        """
+        Redraw every remaining wall onto the chunk's surface.
+
+        Destroyed walls stay in tiles, so that World.reset can put them back.
+        """
+        self.image = pygame.Surface(self.bounds.size).convert()
+        self.image.fill(c.COLORKEY)
+        self.image.set_colorkey(c.COLORKEY)
+        for wall, position in self.tiles:
+            if wall.alive():
+                self.image.blit(wall.image, (position[0] - self.bounds.x, position[1] - self.bounds.y))
+
+        self.dirty = False
+
+    def release(self):
+        """
+        Forget the rendered image, to be rendered again next time the chunk is drawn
+        """
+        self.image = None
+        self.dirty = True
+
+
+class PlacedRoom:
+    """
+    A room template placed in the world.
+
+    template is the rooms.RoomTemplate itself, shared with every other placement of it.
+    x and y are the offset of its top left corner from the top left of the world, in tiles,
+    and rect is its bounding box in tiles.
+    """
+
+    def __init__(self, template, x, y):
+        """
+        :param template: The rooms.RoomTemplate to place
+        :param x: Int. The offset of the room from the left of the world in tiles
+        :param y: Int. The offset of the room from the top of the world in tiles
+        """
+        self.template = template
+        self.x = x
+        self.y = y
+
+        self.rect = pygame.Rect(x, y, template.width, template.height)
+
+    def get_tile(self, column, row):
+        """
+        Return the character at a tile of the world, or None if the room has nothing there
+
+        :param column: Int. The tile's column, counted from the left of the world
+        :param row: Int. The tile's row, counted from the top of the world
+        """
+        if not self.rect.collidepoint(column, row):
+            return None
+
+        room_row = self.template.rows[row - self.y]
+        if column - self.x >= len(room_row):
+            return None
+
+        return room_row[column - self.x]
+
+
 class World:
     """
     Defines the World.
@@ -68,12 +176,28 @@ class World:
         Because of this, a set of nodes corresponding to the centers of tiles
         is added.
 
-    background is a pygame Surface that is displayed behind the level
+    Terrain:
+        Walls and spikes are drawn from pre-rendered TerrainChunks stored in chunks,
+        rather than blitted one sprite at a time.
+
+    Node overlay:
+        With settings['SHOW_NODES'] on, draw_nodes shows the pathfinding nodes and walls.
+        They are drawn onto node_layers once, on the same grid as the terrain chunks,
+        and only redrawn when the graph changes (eg. a bomb destroys a wall).
+
+    background_string is the name of the tile displayed behind the level,
+        scrolled by parallax times the distance the world has moved
 
     region is a value representing what part of the mine the hero is in.
         This effects color scheme, block types, potential enemies, etc.
 
-    KEY for room_array:
+    Layout:
+        rooms is a list of PlacedRooms, from top to bottom, set by place_rooms.
+        Only the room templates and their offsets are stored, rather than a grid of the whole world,
+        so get_room_at and get_tile_at look up the room with a binary search on room_tops.
+        tile_origin is the screen position of the top left corner of the world before it has moved.
+
+    KEY for rooms:
         S is stone
         P is spike
         B is a breakable wall
@@ -86,9 +210,7 @@ class World:
 
     def __init__(self, seed=None):
         """
-        Create the room based on a certain room_array
-
-        room_array is a list of strings that will be rendered into the room
+        Create the world, to be filled in from rooms
 
         :param seed: The seed to use to generate the world. Passed from
             the generateworld() operation to allow for users to save everything
@@ -98,7 +220,6 @@ class World:
         self.logger = logging.getLogger('mineEye.world.World')
 
         self.seed = seed
-        random.seed(self.seed)
 
         self.run_timer = True
 
@@ -114,23 +235,32 @@ class World:
         self.nodes = h.Graph()
 
         self.background_string = 'background.png'
-        self.background = h.create_background(h.load(self.background_string))
+        self.parallax = 0.5  # how far the background scrolls relative to the world
         self.region = None
 
-        self.weapon_factor = 6  # tenths of a percent chance of spawning a weapon a a given node
-
         self.xspeed = 0
         self.yspeed = 0
 
+        # Total distance the world has moved, used to place the terrain chunks
         self.xshift = 0
         self.yshift = 0
 
+        self.chunks = {}
+        self.terrain_origin = None
+
+        self.node_layers = {}
+        self.node_layers_version = None
+
+        # What to put back when the world is reset, as (class, position before the world moved)
+        self.enemy_spawns = []
+        self.weapon_spawns = []
+
         self.base_y_gravity = -3
         self.gravity_acceleration = -1
 
-        self.room_array = []
-
-        self.array_parsed = False
+        self.rooms = []
+        self.room_tops = []
+        self.tile_origin = None
 
     def update(self, hero):
         """
@@ -178,29 +308,118 @@ class World:
         #Update the entities
         self.enemy_projectile_list.update()
 
-    def draw(self, screen):
+    def draw(self, screen, tick):
         """
         Draw everything in the room
 
         :param screen: A pygame surface to blit everything onto.
+        :param tick: The game tick being drawn, used to animate the enemies
         """
-        if self.background.get_size() != screen.get_size():
-            self.background = h.create_background(h.load(self.background_string))
-        screen.blit(self.background, (0, 0))
+        h.blit_background(screen, self.background_string,
+                          (self.xshift * self.parallax, self.yshift * self.parallax))
 
-        if not self.array_parsed:
-            self.parse_room_array()
-            self.add_weapons_to_world()
+        # Each layer is handed to pygame as a single blits call, skipping anything off screen
+        screen_rect = screen.get_rect()
+        screen.blits([(e.get_image(tick), e.rect) for e in self.enemy_list
+                      if screen_rect.colliderect(e.rect)], doreturn=False)
 
-        for e in self.enemy_list:
-            e.draw(screen)
+        self.draw_terrain(screen)
+
+        sprites = []
+        for group in (self.drops_list, self.enemy_projectile_list, self.hero_projectile_list, self.bomb_list):
+            sprites.extend((sprite.image, sprite.rect) for sprite in group if screen_rect.colliderect(sprite.rect))
+        screen.blits(sprites, doreturn=False)
+
+    def draw_terrain(self, screen):
+        """
+        Draw the walls and spikes by blitting every visible terrain chunk
+
+        Chunks that lost a wall since the last frame are re-rendered first.
+        Chunks more than half a screen away have their images released, so that only
+        the chunks around the hero are kept in memory, however far the run has gone.
+
+        :param screen: A pygame surface to blit the chunks onto.
+        """
+        screen_rect = screen.get_rect()
+        nearby_rect = screen_rect.inflate(screen_rect.width, screen_rect.height)
+        visible_chunks = []
+        for chunk in self.chunks.values():
+            chunk_rect = chunk.bounds.move(chunk.origin[0] + self.xshift, chunk.origin[1] + self.yshift)
+            if screen_rect.colliderect(chunk_rect):
+                if chunk.dirty:
+                    chunk.render()
+                visible_chunks.append((chunk.image, chunk_rect))
+            elif chunk.image is not None and not nearby_rect.colliderect(chunk_rect):
+                chunk.release()
+
+        screen.blits(visible_chunks, doreturn=False)
+
+    def render_node_layers(self):
+        """
+        Draw every node of the graph onto the node layers, replacing the old layers.
+
+        Open nodes are shown with a bullet and walls with a red dot.
+        The nodes are grouped on a grid starting at the corner of the first node's tile,
+        and each layer only covers the tiles of its nodes, like the terrain chunks.
+        """
+        span = c.TERRAIN_CHUNK_SIZE * 64
+        node_sprite = h.load('bullet.png')
+        wall_sprite = h.render_marker(c.RED, 6)
+        walls = set(self.nodes.walls)
+
+        grouped_nodes = {}
+        origin = None
+        for index, node in enumerate(self.nodes.nodes):
+            position = (node[0] - self.xshift, node[1] - self.yshift)
+            if origin is None:
+                origin = (position[0] - 32, position[1] - 32)
+
+            key = (int((position[0] - origin[0]) // span), int((position[1] - origin[1]) // span))
+            grouped_nodes.setdefault(key, []).append((position, index in walls))
+
+        self.node_layers = {}
+        for key, nodes in grouped_nodes.items():
+            layer_rect = pygame.Rect(nodes[0][0][0] - 32, nodes[0][0][1] - 32, 64, 64)
+            layer_rect.unionall_ip([pygame.Rect(position[0] - 32, position[1] - 32, 64, 64)
+                                    for position, is_wall in nodes])
+
+            layer = pygame.Surface(layer_rect.size).convert()
+            layer.fill(c.COLORKEY)
+            layer.set_colorkey(c.COLORKEY)
+            for position, is_wall in nodes:
+                sprite = wall_sprite if is_wall else node_sprite
+                layer.blit(sprite, sprite.get_rect(center=(position[0] - layer_rect.x, position[1] - layer_rect.y)))
+
+            self.node_layers[key] = (layer, layer_rect.topleft)
+
+        self.node_layers_version = self.nodes.version
+
+    def draw_nodes(self, screen):
+        """
+        Draw the pathfinding nodes, and the path each enemy is currently following.
 
-        self.block_list.draw(screen)
-        self.spikes_list.draw(screen)
-        self.drops_list.draw(screen)
-        self.enemy_projectile_list.draw(screen)
-        self.hero_projectile_list.draw(screen)
-        self.bomb_list.draw(screen)
+        :param screen: A pygame surface to blit the overlay onto.
+        """
+        if self.node_layers_version != self.nodes.version:
+            self.render_node_layers()
+
+        screen_rect = screen.get_rect()
+        visible_layers = []
+        for layer, origin in self.node_layers.values():
+            position = (origin[0] + self.xshift, origin[1] + self.yshift)
+            if screen_rect.colliderect(position, layer.get_size()):
+                visible_layers.append((layer, position))
+
+        screen.blits(visible_layers, doreturn=False)
+
+        # Paths are only a few nodes long, and change every few ticks, so they are drawn directly
+        path_sprite = h.render_marker(c.GREEN, 4)
+        path_rect = path_sprite.get_rect()
+        for e in self.enemy_list:
+            if e.path:
+                for node_index in e.path:
+                    path_rect.center = self.nodes.nodes[node_index]
+                    screen.blit(path_sprite, path_rect)
 
     def _move_world_x(self, hero, x):
         """
@@ -212,6 +431,7 @@ class World:
         damage the hero if standing on a spike,
         end the game if the hero is standing on a timer
         """
+        self.xshift += x
         self.nodes.shift_nodes_x(x)
         for sprite in self.all_sprites:
             sprite.movex(x)
@@ -227,6 +447,7 @@ class World:
             x_pos_change = block.rect.x - old_x_pos
 
             # Shift the rest of the room to stay in line with the block that collided
+            self.xshift += x_pos_change
             self.nodes.shift_nodes_x(x_pos_change)
             for sprite in self.all_sprites:
                 if sprite != block:
@@ -246,6 +467,7 @@ class World:
         damage the hero if standing on a spike,
         end the game if the hero is standing on a timer
         """
+        self.yshift += y
         self.nodes.shift_nodes_y(y)
         for sprite in self.all_sprites:
             sprite.movey(y)
@@ -278,6 +500,7 @@ class World:
             y_pos_change = block.rect.y - old_y_pos
 
             # Shift the rest of the room to stay in line with the block that collided
+            self.yshift += y_pos_change
             self.nodes.shift_nodes_y(y_pos_change)
             for sprite in self.all_sprites:
                 if sprite != block:
@@ -404,6 +627,7 @@ class World:
                         self.logger.info('destroyed block at {0} with bomb'.format((block.rect.x, block.rect.y)))
                         self.nodes.make_passable((block.rect.centerx, block.rect.centery))
                         block.kill()
+                        block.chunk.dirty = True
 
                 for e in self.enemy_list:
                     distance = h.get_node_dist(e.rect.center, bomb.rect.center)
@@ -462,13 +686,16 @@ class World:
         self.xspeed += changex
         self.yspeed += changey
 
-    def add_weapon(self, node):
+    def add_weapon(self, node, weapon_type):
         """
-        Add a random weapon to a given node
+        Add a weapon to a given node
+
+        :param weapon_type: The class of the weapon from drops.all_weapons
         """
-        weapon = random.choice(drops.all_weapons)(node)
+        weapon = weapon_type(node)
         self.all_sprites.add(weapon.sprite)
         self.drops_list.add(weapon.sprite)
+        self.weapon_spawns.append((weapon_type, (node[0] - self.xshift, node[1] - self.yshift)))
         self.logger.debug('added weapon at {pos}'.format(pos=node))
 
     def add_enemy(self, enemy_, node):
@@ -479,11 +706,14 @@ class World:
         new_enemy.rect.center = node
         self.enemy_list.add(new_enemy)
         self.all_sprites.add(new_enemy)
+        self.enemy_spawns.append((enemy_, (node[0] - self.xshift, node[1] - self.yshift)))
         self.logger.debug('added {enemy} at {pos}'.format(enemy=enemy_.name, pos=node))
 
-    def add_wall(self, node, **kwargs):
+    def add_wall(self, node, update_graph=True, **kwargs):
         """
         add a wall with a given modifier
+
+        :param update_graph: Boolean. False if the node is already a wall in the graph
         """
         if 'damage' in kwargs:
             self.logger.debug('added spikes at {pos}'.format(pos=node))
@@ -496,101 +726,163 @@ class World:
 
         wall = Wall(node, **kwargs)
         self.all_sprites.add(wall)
+        self.add_to_terrain(wall)
 
         if 'damage' not in kwargs:
             self.block_list.add(wall)
-            self.nodes.add_wall(node)
+            if update_graph:
+                self.nodes.add_wall(node)
         else:
             self.spikes_list.add(wall)
 
-    def parse_room_array(self):
+    def add_to_terrain(self, wall):
         """
-        Turn a list of strings into an array of walls and enemies.
+        Add a wall to the terrain chunk that covers its position, creating the chunk if needed.
 
-        Move top -> bottom through the rows, and go left -> through each character in a given row
+        Chunks are laid out on a grid starting at the first wall added to the world.
+        """
+        position = (wall.rect.x - self.xshift, wall.rect.y - self.yshift)
+        if self.terrain_origin is None:
+            self.terrain_origin = position
 
-        Add a block, enemy, chest, etc. with the characteristics below at a given position
-        for each character in the room. Each block unit is 64x64 px
+        span = c.TERRAIN_CHUNK_SIZE * 64
+        key = ((position[0] - self.terrain_origin[0]) // span, (position[1] - self.terrain_origin[1]) // span)
 
-        KEY for room_array:
-        S is stone
-        P is spike
-        B is a breakable wall
-        T is a turret
-        G is a ghost
-        R is a block that stops the timer
-        W is a weapon chest
-        D is door <- IMPORTANT, you need a 2 wide door at the top and bottom to make the logic work
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = TerrainChunk((self.terrain_origin[0] + key[0] * span, self.terrain_origin[1] + key[1] * span))
+            self.chunks[key] = chunk
+
+        chunk.add(wall, position)
+
+    def place_rooms(self, placements):
+        """
+        Lay the rooms out in the world.
+
+        The first room is placed just up and left of the center of the screen.
+
+        :param placements: A list of (room, x offset, y offset) tuples, with the offsets in tiles,
+            from top to bottom, as made by worldgen.align_doors
         """
-        x = settings['SCREEN_RESOLUTION'][0] / 2 - 128
-        y = settings['SCREEN_RESOLUTION'][1] / 2 - 128
+        self.rooms = [PlacedRoom(room, x_offset, y_offset) for room, x_offset, y_offset in placements]
+        self.room_tops = [room.y for room in self.rooms]
 
-        #Just because there are a bunch of blank tiles doesn't mean we want to spawn
+        #Just because other rooms stick out further left doesn't mean we want to spawn
         #our first real tile all the way to the right of the screen.
-        #To fix this, we reduce our starting X by a tile for every blank tile we have
-        blanks = [char for char in self.room_array[0] if char == '&']
-        x -= 64 * len(blanks)
+        #To fix this, we reduce our starting X by a tile for every tile the first room is offset
+        self.tile_origin = (settings['SCREEN_RESOLUTION'][0] / 2 - 128 - 64 * self.rooms[0].x,
+                            settings['SCREEN_RESOLUTION'][1] / 2 - 128)
+
+    def get_room_at(self, column, row):
+        """
+        Return the PlacedRoom covering a tile, or None if no room does
+
+        :param column: Int. The tile's column, counted from the left of the world
+        :param row: Int. The tile's row, counted from the top of the world
+        """
+        index = bisect.bisect_right(self.room_tops, row) - 1
+        if index < 0:
+            return None
+
+        room = self.rooms[index]
+        if room.rect.collidepoint(column, row):
+            return room
 
-        xstart = x
-        self.logger.info('Parsing the room into entities')
-        for row in self.room_array:
-            for col in row:
-                node = (x+32, y+32)
+    def get_tile_at(self, column, row):
+        """
+        Return the character making up a tile of the world, or None if there is nothing there
 
-                if col != "&":
-                    self.nodes.append(node)
+        :param column: Int. The tile's column, counted from the left of the world
+        :param row: Int. The tile's row, counted from the top of the world
+        """
+        room = self.get_room_at(column, row)
+        if room is not None:
+            return room.get_tile(column, row)
 
-                if col == "S":
-                    self.add_wall(node)
+    def get_tile_position(self, position):
+        """
+        Return the (column, row) of the tile at a position on the screen
+
+        :param position: Int tuple representing a position on the screen
+        """
+        return (int((position[0] - self.xshift - self.tile_origin[0]) // 64),
+                int((position[1] - self.yshift - self.tile_origin[1]) // 64))
 
-                elif col == "R":
-                    self.add_wall(node, end_timer=True)
+    def restore(self, layout):
+        """
+        Fill the world in from its layout, creating the walls, enemies and weapons.
 
-                elif col == "P":
-                    self.add_wall(node, damage=1)
+        Each block unit is 64x64 px
 
-                elif col == "B":
-                    self.add_wall(node, breakable=True)
+        :param layout: A worldgen.WorldLayout, generated or loaded by worldcache
+        """
+        self.place_rooms(layout.placements)
+        x = self.tile_origin[0] + 32
+        y = self.tile_origin[1] + 32
 
-                elif col == "V":
-                    self.add_enemy(enemy.Volcano, node)
+        self.nodes.nodes = [(x + 64*column, y + 64*row) for column, row in layout.nodes]
+        self.nodes.walls = list(layout.walls)
+        self.nodes.version += 1
 
-                elif col == "G":
-                    self.add_enemy(enemy.Ghost, node)
+        for (column, row), char, weapon_number in layout.spawns:
+            node = (x + 64*column, y + 64*row)
 
-                elif col == "F":
-                    self.add_enemy(enemy.FireBat, node)
+            if char in rooms.WALL_TILES:
+                self.add_wall(node, update_graph=False, **rooms.WALL_TILES[char])
 
-                elif col == "W":
-                    self.add_weapon(node)
+            elif char in rooms.ENEMY_TILES:
+                self.add_enemy(getattr(enemy, rooms.ENEMY_TILES[char]), node)
 
-                x += 64
-            y += 64
-            x = xstart
+            else:
+                self.add_weapon(node, drops.all_weapons[weapon_number])
 
         self.logger.debug('number of created enemies: {0}'.format(len(self.enemy_list)))
         self.logger.debug('number of created nodes: {0}'.format(len(self.nodes.nodes)))
         self.logger.debug('number of created weapons: {0}'.format(len(self.drops_list)))
 
-        self.logger.info('World parsed successfully')
-        self.array_parsed = True
-
-    def add_weapons_to_world(self):
+    def reset(self):
         """
-        After the world is parsed into entities, add weapons to it
+        Put the world back the way it was built, for the hero's next loop through it.
+
+        The walls, chunks and graph are kept. Only what changes while playing is undone:
+        * Remove the enemies, drops, projectiles and bombs, and spawn the enemies and weapons again
+        * Move everything back to where it started
+        * Put back the walls destroyed by bombs
         """
-        self.logger.debug('Adding weapons to the world')
+        self.logger.info('Resetting the world')
+        enemy_spawns = self.enemy_spawns
+        weapon_spawns = self.weapon_spawns
+        self.enemy_spawns = []
+        self.weapon_spawns = []
+
+        for group in (self.enemy_list, self.drops_list, self.enemy_projectile_list,
+                      self.hero_projectile_list, self.bomb_list):
+            for sprite in group:
+                sprite.kill()
+
+        # Only walls are left moving with the world
+        for sprite in self.all_sprites:
+            sprite.movex(-self.xshift)
+            sprite.movey(-self.yshift)
+        self.nodes.shift_nodes_x(-self.xshift)
+        self.nodes.shift_nodes_y(-self.yshift)
+        self.xshift = 0
+        self.yshift = 0
+
+        for chunk in self.chunks.values():
+            for wall, position in chunk.tiles:
+                if not wall.alive():
+                    wall.rect.topleft = (chunk.origin[0] + position[0], chunk.origin[1] + position[1])
+                    self.all_sprites.add(wall)
+                    self.block_list.add(wall)
+                    self.nodes.add_wall(wall.rect.center)
+                    chunk.dirty = True
 
-        for node in self.nodes.nodes:
-            if self.nodes.passable(node):
-                if random.randint(0, 1000) <= self.weapon_factor:
-                    if len(self.drops_list) == 0:
-                        self.add_weapon(node)
-                    else:
-                        done = False
-                        for existing_weapon in self.drops_list:
-                            if h.get_node_dist(existing_weapon.rect.center, node) < 10000 and not done:
-                                self.add_weapon(node)
-                                done = True
+        for enemy_, node in enemy_spawns:
+            self.add_enemy(enemy_, node)
+        for weapon_type, node in weapon_spawns:
+            self.add_weapon(node, weapon_type)
 
-        self.logger.debug('{0} weapons added'.format(len(self.drops_list)))
\ No newline at end of file
+        self.xspeed = 0
+        self.yspeed = 0
+        self.run_timer = True
@@ -0,0 +1,189 @@
+"""
+Keep generated worlds on disk, so that playing a seed again skips generating it.
+
+Each world is stored in its own file in worldcache/, named after everything that decides what
+the world looks like: the seed, the number of rooms, a hash of the rooms, weapons and generation constants,
+and settings['GENERATOR_VERSION'].
+Changing any of them means looking for a different file, so old files are never read by mistake.
+
+A file holds a header followed by arrays of 4 byte ints:
+    rooms - (template number, x offset, y offset) for every room placed
+    nodes - (column, row) for every node of the graph, in order
+    walls - the numbers of the nodes that are walls
+    spawns - (column, row, tile character, weapon number) for every wall, enemy and weapon, in the order
+        they were created
+These are the parts of a worldgen.WorldLayout.
+Positions are in tiles, so a file works at any screen resolution.
+
+Files are memory-mapped to be read.
+Only the MAX_STORED_WORLDS most recently played worlds are kept. Older files are deleted
+whenever a new world is stored.
+"""
+import os
+import json
+import mmap
+import array
+import struct
+import hashlib
+import logging
+from config import settings
+import constants as c
+import rooms as r
+import drops
+import worldgen
+
+module_logger = logging.getLogger('mineEye.worldcache')
+
+CACHE_FOLDER = 'worldcache'
+MAGIC = b'mEw2'
+HEADER = struct.Struct('<4s4i')  # magic, then the number of rooms, nodes, walls and spawns
+MAX_STORED_WORLDS = 200  # about 40 KB each
+
+_rooms_hash = None
+
+
+def get_rooms_hash():
+    """
+    Return a hash of the room definitions, weapons, and the constants that change how rooms
+    and weapons are chosen, calculating it the first time.
+
+    :returns rooms_hash: A hex string
+    """
+    global _rooms_hash
+
+    if _rooms_hash is None:
+        contents = json.dumps({'rooms': r.room_dict,
+                               'weapons': [weapon.__name__ for weapon in drops.all_weapons],
+                               'walls': r.WALL_TILES,
+                               'enemies': r.ENEMY_TILES,
+                               'weapon_factor': c.WEAPON_FACTOR,
+                               'max_rooms_in_a_row': c.MAX_ROOMS_IN_A_ROW,
+                               'repeat_room_odds': c.REPEAT_ROOM_ODDS}, sort_keys=True)
+        _rooms_hash = hashlib.sha1(contents.encode()).hexdigest()[:16]
+
+    return _rooms_hash
+
+
+def get_cache_path(seed, room_count):
+    """
+    Return the path of the file a seed's world is stored in
+
+    :param seed: The seed of the world
+    :param room_count: The number of rooms generated for the world, not counting the start and end
+    """
+    file_name = '{seed}-{count}-{rooms}-v{version}.world'.format(
+        seed=seed, count=room_count, rooms=get_rooms_hash(), version=settings['GENERATOR_VERSION'])
+
+    return os.path.join(CACHE_FOLDER, file_name)
+
+
+def save_layout(layout, room_count):
+    """
+    Store the layout of a world that has just been generated.
+
+    :param layout: The worldgen.WorldLayout to store
+    :param room_count: The number of rooms generated for the world, not counting the start and end
+    """
+    template_names = sorted(r.templates)
+
+    room_ints = array.array('i')
+    for room, x_offset, y_offset in layout.placements:
+        room_ints.extend((template_names.index(room.name), x_offset, y_offset))
+
+    node_ints = array.array('i')
+    for node in layout.nodes:
+        node_ints.extend(node)
+
+    wall_ints = array.array('i', layout.walls)
+
+    spawn_ints = array.array('i')
+    for (column, row), char, weapon_number in layout.spawns:
+        spawn_ints.extend((column, row, ord(char), weapon_number))
+
+    os.makedirs(CACHE_FOLDER, exist_ok=True)
+    path = get_cache_path(layout.seed, room_count)
+    with open(path + '.tmp', 'wb') as outfile:
+        outfile.write(HEADER.pack(MAGIC, len(layout.placements), len(layout.nodes),
+                                  len(wall_ints), len(layout.spawns)))
+        for ints in (room_ints, node_ints, wall_ints, spawn_ints):
+            outfile.write(ints.tobytes())
+
+    # Only replace the file once it is complete, so a half written file is never read
+    os.replace(path + '.tmp', path)
+    module_logger.info('stored world {0}'.format(path))
+
+    remove_old_layouts()
+
+
+def remove_old_layouts():
+    """
+    Delete the least recently played stored worlds, keeping only MAX_STORED_WORLDS of them
+    """
+    try:
+        paths = [os.path.join(CACHE_FOLDER, file_name) for file_name in os.listdir(CACHE_FOLDER)
+                 if file_name.endswith('.world')]
+        if len(paths) <= MAX_STORED_WORLDS:
+            return
+
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - MAX_STORED_WORLDS]:
+            os.remove(path)
+            module_logger.info('removed stored world {0}'.format(path))
+
+    except OSError:
+        module_logger.exception('could not remove old stored worlds')
+
+
+def load_layout(seed, room_count):
+    """
+    Read the layout of the world for a seed from its file, if it has been stored.
+
+    :param seed: The seed of the world
+    :param room_count: The number of rooms generated for the world, not counting the start and end
+    :returns layout: A worldgen.WorldLayout, or None if the seed's world isn't stored
+    """
+    path = get_cache_path(seed, room_count)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'rb') as infile, mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, placed_count, node_count, wall_count, spawn_count = HEADER.unpack_from(data)
+            if magic != MAGIC:
+                raise ValueError('not a stored world')
+
+            payload_ints = 3 * placed_count + 2 * node_count + wall_count + 4 * spawn_count
+            if len(data) - HEADER.size != 4 * payload_ints:
+                raise ValueError('stored world is {0} bytes long, expected {1}'.format(
+                    len(data), HEADER.size + 4 * payload_ints))
+
+            with memoryview(data) as view:
+                ints = view[HEADER.size:].cast('i')
+                rooms_end = 3 * placed_count
+                nodes_end = rooms_end + 2 * node_count
+                walls_end = nodes_end + wall_count
+                spawns_end = walls_end + 4 * spawn_count
+
+                room_ints = ints[:rooms_end].tolist()
+                node_ints = ints[rooms_end:nodes_end].tolist()
+                wall_ints = ints[nodes_end:walls_end].tolist()
+                spawn_ints = ints[walls_end:spawns_end].tolist()
+                ints.release()
+
+        template_names = sorted(r.templates)
+        placements = [(r.templates[template_names[room_ints[i]]], room_ints[i + 1], room_ints[i + 2])
+                      for i in range(0, len(room_ints), 3)]
+
+        # Playing a world again keeps it from being removed by remove_old_layouts
+        os.utime(path)
+
+    except (OSError, ValueError, TypeError, IndexError, struct.error):
+        module_logger.exception('could not read stored world {0}, generating it instead'.format(path))
+        return None
+
+    nodes = list(zip(node_ints[::2], node_ints[1::2]))
+    spawns = [((spawn_ints[i], spawn_ints[i + 1]), chr(spawn_ints[i + 2]), spawn_ints[i + 3])
+              for i in range(0, len(spawn_ints), 4)]
+
+    module_logger.info('loaded world {0}'.format(path))
+    return worldgen.WorldLayout(seed, placements, nodes, wall_ints, spawns)
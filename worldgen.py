@@ -0,0 +1,304 @@
+"""
+Generate worlds from seeds.
+
+Everything here works on plain data - room templates, tile positions and random.Randoms
+seeded with the world's seed - rather than on sprites, and nothing touches the random module's
+own state. That way a world can be generated
+away from the game loop, and world.World.restore turns the result into sprites.
+
+While the player is in a menu, the world for any InGame waiting to be entered is generated
+in the background by pregenerate. get_layout hands it over, waiting for it to finish if it
+hasn't yet. Both go through build_layout with the same seed, so a world is identical
+whether it was generated in the background or not.
+"""
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import settings
+import constants as c
+import rooms as r
+import drops
+import helpers as h
+
+module_logger = logging.getLogger('mineEye.worldgen')
+
+MAX_PENDING = 4  # worlds kept waiting to be entered
+
+_executor = None
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+class WorldLayout:
+    """
+    Everything needed to build a world, without any sprites.
+
+    Positions are (column, row) tuples in tiles from the top left of the world.
+        placements are (room, x offset, y offset) tuples, one per room, from top to bottom
+        nodes are the positions of every node of the graph, in order
+        walls are the numbers of the nodes that are walls in the graph
+        spawns are (position, tile character, weapon number) tuples, for every wall, enemy
+            and weapon in the order they are created. weapon number is the index in drops.all_weapons
+    """
+
+    def __init__(self, seed, placements, nodes, walls, spawns):
+        self.seed = seed
+        self.placements = placements
+        self.nodes = nodes
+        self.walls = walls
+        self.spawns = spawns
+
+
+def generate_rooms(n, rng, version):
+    """
+    Generate the world by semi-randomly selecting n rooms.
+
+    * Add StartingRoom to the beginning
+    * Using the game seed, randomly select n rooms from the rest (not StartingRoom, EndingRoom, TransitionRoom)
+        * Criteria are as follows:
+            * Don't move left or right more than 5 times in a row
+            * Don't move down more than 3 times in a row
+            * The same room is less likely to be selected twice in a row
+    * Finally, add the ending room
+
+    version is settings['GENERATOR_VERSION'], and picks how the rooms are selected.
+    Version 1 picks rooms until one matches the criteria.
+    Version 2 looks up the rooms that match in rooms.get_transition_table(), and picks once per room.
+    The two versions give different worlds from the same seed.
+
+    :param n: The Int number of rooms to randomly choose
+    :param rng: The random.Random to choose with
+    :param version: The Int version of the generator to use
+    :returns room_list: A list of rooms.RoomTemplates, in order from top to bottom
+    """
+    module_logger.debug('Generating New World')
+
+    if version >= 2:
+        names = choose_rooms_from_table(n, rng)
+    else:
+        names = choose_rooms_by_rejection(n, rng)
+
+    room_list = [r.templates[name] for name in ["StartingRoom"] + names + ["EndingRoom"]]
+    module_logger.debug('===============WorldGen Complete===============')
+
+    return room_list
+
+
+def choose_rooms_by_rejection(n, rng):
+    """
+    Select rooms for generate_rooms the version 1 way.
+
+    Randomly pick a room until one matches the criteria,
+    if the same room is selected twice, it is only kept with the odds in constants.REPEAT_ROOM_ODDS.
+
+    :param n: The Int number of rooms to randomly choose
+    :param rng: The random.Random to choose with
+    :returns names: A list of the names of the chosen rooms
+    """
+    possible_names = sorted(name for name in r.templates
+                            if name not in ["StartingRoom", "EndingRoom", "TransitionRoom"])
+
+    repeat_weight, weight = c.REPEAT_ROOM_ODDS
+
+    names = []
+    previous_name = "StartingRoom"
+    previous_direction = None
+    in_a_row = 0
+
+    for i in range(n):
+        while True:
+            name = rng.choice(possible_names)
+            direction = r.templates[name].direction
+
+            if direction == previous_direction and in_a_row >= c.MAX_ROOMS_IN_A_ROW[direction]:
+                continue
+
+            if name == previous_name and rng.randint(0, weight - 1) < weight - repeat_weight:
+                continue
+
+            break
+
+        in_a_row = in_a_row + 1 if direction == previous_direction else 1
+        previous_name = name
+        previous_direction = direction
+        names.append(name)
+
+    return names
+
+
+def choose_rooms_from_table(n, rng):
+    """
+    Select rooms for generate_rooms the version 2 way.
+
+    Each room is picked with a single weighted draw from the rooms
+    allowed to follow the last one, so long worlds take linear time.
+
+    :param n: The Int number of rooms to randomly choose
+    :param rng: The random.Random to choose with
+    :returns names: A list of the names of the chosen rooms
+    """
+    transition_table = r.get_transition_table()
+
+    names = []
+    state = ("StartingRoom", 0)
+
+    for i in range(n):
+        allowed_names, cumulative_weights = transition_table[state]
+        name = rng.choices(allowed_names, cum_weights=cumulative_weights)[0]
+
+        if r.templates[name].direction == r.templates[state[0]].direction and state[1] > 0:
+            state = (name, state[1] + 1)
+        else:
+            state = (name, 1)
+
+        names.append(name)
+
+    return names
+
+
+def align_doors(room_list):
+    """
+    Align all the doors to create a world that is solvable
+
+    Rather than padding the rows of the rooms with blank tiles, each room is given
+    an offset from the left edge of the world in one pass:
+    * Take the exit door at the bottom of the last room,
+    * And the entrance door at the top of the new room,
+    * Offset the new room from the last one by the distance between the doors
+    * Finally, shift every offset so that the leftmost room starts at 0
+
+    :param room_list: The list of rooms.RoomTemplates to align, as made by generate_rooms
+    :returns placements: A list of (room, x offset, y offset) tuples, one per room,
+        with the offsets measured in tiles
+    """
+    module_logger.debug('===Begin aligning the doors===')
+    placements = []
+    x_offset = 0
+    y_offset = 0
+    for index, room in enumerate(room_list):
+        if placements:
+            previous_room, previous_x_offset, previous_y_offset = placements[-1]
+
+            # Line up the previous room's exit door with the new room's entrance door
+            x_offset = previous_x_offset + previous_room.exit - room.entrance
+
+            module_logger.debug('room {0}: previous door location: {1}, new door location: {2}'.format(
+                index, previous_room.exit, room.entrance))
+
+        placements.append((room, x_offset, y_offset))
+        y_offset += room.height
+
+    leftmost = min(x_offset for room, x_offset, y_offset in placements)
+    placements = [(room, x_offset - leftmost, y_offset) for room, x_offset, y_offset in placements]
+
+    module_logger.debug('----====Finished World====----')
+
+    return placements
+
+
+def build_layout(seed, n, version):
+    """
+    Generate the world for a seed, and work out everything in it.
+
+    * Choose the rooms and align their doors
+    * Move top -> bottom through the rooms, adding the nodes, walls, enemies and chests
+        listed in each room's template, offset by the room's position
+    * Add extra weapons to some of the open nodes
+
+    The rooms and the weapons are each chosen with their own random.Random, both seeded with
+    the world's seed. These make the same draws, in the same order, as the game has always made
+    with the random module, so seeds keep giving the same worlds.
+
+    :param seed: The seed of the world
+    :param n: The Int number of rooms to randomly choose
+    :param version: The Int version of the generator to use, from settings['GENERATOR_VERSION']
+    :returns layout: A WorldLayout
+    """
+    room_rng = random.Random(seed)
+    weapon_rng = random.Random(seed)
+
+    placements = align_doors(generate_rooms(n, room_rng, version))
+
+    nodes = []
+    walls = []
+    spawns = []
+    weapon_positions = []
+
+    for room, x_offset, y_offset in placements:
+        first_node = len(nodes)
+        nodes.extend((x_offset + column, y_offset + row) for column, row in room.nodes)
+
+        walls.extend(first_node + node_number for node_number in room.graph_walls)
+
+        for (column, row), char in room.walls + room.enemies:
+            spawns.append(((x_offset + column, y_offset + row), char, 0))
+
+        for column, row in room.weapons:
+            weapon_number = drops.all_weapons.index(weapon_rng.choice(drops.all_weapons))
+            spawns.append(((x_offset + column, y_offset + row), r.WEAPON_TILE, weapon_number))
+            weapon_positions.append((x_offset + column, y_offset + row))
+
+    # Weapons are only added near other weapons
+    wall_set = set(walls)
+    for index, node in enumerate(nodes):
+        if index not in wall_set and weapon_rng.randint(0, 1000) <= c.WEAPON_FACTOR:
+            if not weapon_positions or any(h.get_node_dist((64*x, 64*y), (64*node[0], 64*node[1])) < 10000
+                                           for x, y in weapon_positions):
+                weapon_number = drops.all_weapons.index(weapon_rng.choice(drops.all_weapons))
+                spawns.append((node, r.WEAPON_TILE, weapon_number))
+                weapon_positions.append(node)
+
+    module_logger.debug('number of created nodes: {0}'.format(len(nodes)))
+    module_logger.debug('number of created weapons: {0}'.format(len(weapon_positions)))
+
+    return WorldLayout(seed, placements, nodes, walls, spawns)
+
+
+def pregenerate(seed, n):
+    """
+    Start generating the world for a seed in the background, unless it already is.
+
+    Only the last MAX_PENDING seeds are kept, so worlds for menus that were left are forgotten.
+
+    :param seed: The seed of the world
+    :param n: The Int number of rooms to randomly choose
+    """
+    global _executor
+
+    key = (seed, n, settings['GENERATOR_VERSION'])
+    with _pending_lock:
+        if key in _pending:
+            return
+
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='worldgen')
+
+        _pending[key] = _executor.submit(build_layout, *key)
+        while len(_pending) > MAX_PENDING:
+            oldest_key = next(iter(_pending))
+            _pending.pop(oldest_key).cancel()
+
+    module_logger.debug('pregenerating world {0}'.format(seed))
+
+
+def get_layout(seed, n):
+    """
+    Return the layout of the world for a seed, generated in the background if it was started.
+
+    Waits for the background generation to finish if it hasn't yet,
+    and generates the world here if it was never started.
+
+    :param seed: The seed of the world
+    :param n: The Int number of rooms to randomly choose
+    :returns layout: A WorldLayout
+    """
+    key = (seed, n, settings['GENERATOR_VERSION'])
+    with _pending_lock:
+        future = _pending.pop(key, None)
+
+    if future is not None:
+        module_logger.info('using pregenerated world {0}'.format(seed))
+        return future.result()
+
+    return build_layout(*key)